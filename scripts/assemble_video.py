@@ -6,21 +6,59 @@ Also generates YouTube chapter markers file.
 """
 
 import argparse
-import subprocess
+import os
 import tempfile
 from pathlib import Path
 
+from dotenv import load_dotenv
+
+from create_segment import build_image_input, build_video_graph
 from utils import (
     load_segments,
     ensure_dir,
     get_all_segments,
-    get_video_duration,
+    get_durations,
     format_timestamp,
+    should_use_ken_burns,
     check_ffmpeg,
     get_ffmpeg_path,
+    get_video_encoder,
+    get_encoder_args,
+    get_stream_params_many,
+    probe_stream_params,
+    run_ffmpeg,
 )
 
 
+# Upper bound on segments for assemble_direct. Each segment opens two input
+# files, so larger projects risk the per-process open file limit.
+MAX_DIRECT_SEGMENTS = 100
+
+# Upper bound on clips joined with the concat filter, which opens every clip
+# as a separate input (the same open file budget as assemble_direct)
+MAX_FILTER_CONCAT_CLIPS = 2 * MAX_DIRECT_SEGMENTS
+
+
+def scan_clips(clips_path: Path) -> set:
+    """
+    List the .mp4 clips in a directory with one os.scandir pass.
+
+    Args:
+        clips_path: Directory containing video segments
+
+    Returns:
+        Set of clip file names (empty if the directory does not exist)
+    """
+    try:
+        with os.scandir(clips_path) as entries:
+            return {
+                entry.name for entry in entries
+                if entry.name.endswith(".mp4") and entry.is_file()
+            }
+    except FileNotFoundError:
+        return set()
+
+
 def assemble_video(clips_dir: str, output_path: str, segments_file: str = None) -> bool:
     """
     Assemble video segments into a final video.
@@ -42,21 +80,22 @@ def assemble_video(clips_dir: str, output_path: str, segments_file: str = None)
     output = Path(output_path)
     ensure_dir(output.parent)
 
-    # Get list of clips
+    # Get list of clips from a single directory scan
+    clip_names = scan_clips(clips_path)
     if segments_file:
         # Use segments.json for ordering
         data = load_segments(segments_file)
         segments = get_all_segments(data)
         clip_files = []
         for segment, chapter in segments:
-            clip_file = clips_path / f"{segment['segment_id']}.mp4"
-            if clip_file.exists():
-                clip_files.append(clip_file)
+            clip_name = f"{segment['segment_id']}.mp4"
+            if clip_name in clip_names:
+                clip_files.append(clips_path / clip_name)
             else:
-                print(f"Warning: Missing clip {clip_file}")
+                print(f"Warning: Missing clip {clips_path / clip_name}")
     else:
         # Just sort by filename
-        clip_files = sorted(clips_path.glob("*.mp4"))
+        clip_files = [clips_path / name for name in sorted(clip_names)]
 
     if not clip_files:
         print("Error: No video clips found")
@@ -64,44 +103,248 @@ def assemble_video(clips_dir: str, output_path: str, segments_file: str = None)
 
     print(f"Assembling {len(clip_files)} clips...")
 
-    # Create concat file for FFmpeg
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-        for clip in clip_files:
-            # FFmpeg concat requires escaped paths
-            escaped_path = str(clip.absolute()).replace("'", "'\\''")
-            f.write(f"file '{escaped_path}'\n")
-        concat_file = f.name
+    with tempfile.TemporaryDirectory() as work_dir:
+        try:
+            # Stream copy silently corrupts the output if clips differ in codec
+            # parameters, so only use it when every clip matches the first one
+            # (parameters come from create_segment's sidecars when present,
+            # otherwise from ffprobe run in parallel)
+            try:
+                clip_params = get_stream_params_many([str(clip) for clip in clip_files])
+            except RuntimeError:
+                print(
+                    "Warning: ffprobe not found; joining with stream copy without "
+                    "checking that clip codec parameters match"
+                )
+                clip_params = {}
+            reference = clip_params.get(str(clip_files[0]))
+            mismatched = [
+                clip for clip in clip_files[1:]
+                if clip_params and clip_params[str(clip)] != reference
+            ]
+
+            if mismatched:
+                print(
+                    f"{len(mismatched)} clips differ in codec parameters from "
+                    f"{clip_files[0].name}; re-encoding them to match"
+                )
+                matched = match_clips(ffmpeg, mismatched, reference, Path(work_dir))
+
+            if not mismatched or matched is not None:
+                if mismatched:
+                    clip_files = [matched.get(clip, clip) for clip in clip_files]
+                elif clip_params:
+                    print("Clip codec parameters match; joining with stream copy")
+                cmd = build_demuxer_concat_command(
+                    ffmpeg, clip_files, str(output), Path(work_dir) / "concat.txt"
+                )
+            elif len(clip_files) <= MAX_FILTER_CONCAT_CLIPS:
+                print("Could not match codec parameters; re-encoding all clips with the concat filter")
+                cmd = build_filter_concat_command(ffmpeg, clip_files, str(output))
+            else:
+                print(
+                    f"Error: could not re-encode clips to match {clip_files[0].name}, and "
+                    f"{len(clip_files)} clips exceed the {MAX_FILTER_CONCAT_CLIPS} the "
+                    f"concat filter can open at once. Recreate the mismatched clips with "
+                    f"create_segment.py and assemble again."
+                )
+                return False
 
-    try:
-        # Use FFmpeg concat demuxer
-        cmd = [
-            ffmpeg, "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", concat_file,
-            "-c", "copy",
-            str(output)
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            print(f"FFmpeg error: {result.stderr}")
+            returncode, log = run_ffmpeg(cmd)
+
+            if returncode != 0:
+                print(f"FFmpeg error: {log}")
+                return False
+
+            # Generate chapter markers if segments.json provided
+            if segments_file:
+                generate_chapters(clips_dir, segments_file, str(output))
+
+            return True
+
+        except Exception as e:
+            print(f"Error assembling video: {e}")
             return False
 
-        # Generate chapter markers if segments.json provided
-        if segments_file:
-            generate_chapters(clips_dir, segments_file, str(output))
 
-        return True
+def build_demuxer_concat_command(
+    ffmpeg: str,
+    clip_files: list,
+    output_path: str,
+    concat_file: Path
+) -> list:
+    """
+    Write the concat list and build an FFmpeg command that joins the clips
+    with the concat demuxer and stream copy.
 
-    except Exception as e:
-        print(f"Error assembling video: {e}")
-        return False
+    Args:
+        ffmpeg: Path to the FFmpeg executable
+        clip_files: Ordered list of clip paths (with matching codec parameters)
+        output_path: Path for the final video
+        concat_file: Where to write the concat list
+
+    Returns:
+        FFmpeg command as an argument list
+    """
+    # FFmpeg concat requires escaped, absolute paths; the list is written with
+    # a single syscall and the working directory is resolved once instead of
+    # per clip by Path.absolute()
+    cwd = Path.cwd()
+    body = "".join(
+        "file '"
+        + os.fspath(clip if clip.is_absolute() else cwd / clip).replace("'", "'\\''")
+        + "'\n"
+        for clip in clip_files
+    )
+    concat_file.write_bytes(body.encode("utf-8"))
+
+    return [
+        ffmpeg, "-y",
+        "-loglevel", "error", "-nostats",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", str(concat_file),
+        "-c", "copy",
+        output_path
+    ]
+
+
+def match_clips(ffmpeg: str, clips: list, reference: list, work_dir: Path):
+    """
+    Re-encode clips with a reference clip's codec parameters, so they can be
+    joined with the others by stream copy.
+
+    Args:
+        ffmpeg: Path to the FFmpeg executable
+        clips: Clips to re-encode
+        reference: Per-stream parameters of the reference clip
+        work_dir: Directory for the re-encoded clips
+
+    Returns:
+        Mapping of each clip to its re-encoded copy, or None if a clip could
+        not be made to match
+    """
+    video = next((s for s in reference if s.get("codec_type") == "video"), None)
+    audio = next((s for s in reference if s.get("codec_type") == "audio"), None)
+    if not video or video.get("codec_name") != "h264" or not audio:
+        return None  # The encoders here only produce H.264 with AAC
+
+    matched = {}
+    for i, clip in enumerate(clips):
+        output = work_dir / f"matched_{i}.mp4"
+        returncode, log = run_ffmpeg(build_match_command(ffmpeg, clip, video, audio, str(output)))
+        if returncode != 0:
+            print(f"  Could not re-encode {clip.name}: {log}")
+            return None
+        if probe_stream_params(str(output)) != reference:
+            print(f"  Re-encoded {clip.name} still differs from the reference")
+            return None
+        matched[clip] = output
+    return matched
+
+
+# ffprobe's H.264 profile names and the matching -profile:v values
+H264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+
+
+def build_match_command(
+    ffmpeg: str,
+    clip: Path,
+    video: dict,
+    audio: dict,
+    output_path: str
+) -> list:
+    """
+    Build an FFmpeg command that re-encodes a clip with given video and
+    audio stream parameters (as reported by get_stream_params).
+
+    Args:
+        ffmpeg: Path to the FFmpeg executable
+        clip: Clip to re-encode
+        video: Reference video stream parameters
+        audio: Reference audio stream parameters
+        output_path: Path for the re-encoded clip
+
+    Returns:
+        FFmpeg command as an argument list
+    """
+    width, height = video.get("width", 1920), video.get("height", 1080)
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"fps={video.get('r_frame_rate', '30/1')},format={video.get('pix_fmt', 'yuv420p')}"
+    )
+
+    cmd = [
+        ffmpeg, "-y",
+        "-loglevel", "error", "-nostats",
+        "-i", str(clip),
+        "-vf", video_filter,
+        *get_encoder_args(get_video_encoder()),
+    ]
+    profile = H264_PROFILES.get(video.get("profile"))
+    if profile:
+        cmd.extend(["-profile:v", profile])
+    time_base = video.get("time_base", "")
+    if time_base.startswith("1/"):
+        cmd.extend(["-video_track_timescale", time_base[2:]])
+
+    cmd.extend(["-c:a", "aac", "-b:a", "192k"])
+    if audio.get("sample_rate"):
+        cmd.extend(["-ar", str(audio["sample_rate"])])
+    if audio.get("channels"):
+        cmd.extend(["-ac", str(audio["channels"])])
+    cmd.append(output_path)
+    return cmd
+
+
+def build_filter_concat_command(ffmpeg: str, clip_files: list, output_path: str) -> list:
+    """
+    Build an FFmpeg command that joins clips with the concat filter.
+
+    Every clip is normalized to 1920x1080 at 30fps with stereo 44.1kHz audio
+    and the result is re-encoded, so clips with mismatched codec parameters
+    can still be joined.
+
+    Args:
+        ffmpeg: Path to the FFmpeg executable
+        clip_files: Ordered list of clip paths
+        output_path: Path for the final video
 
-    finally:
-        # Clean up temp file
-        Path(concat_file).unlink(missing_ok=True)
+    Returns:
+        FFmpeg command as an argument list
+    """
+    inputs = []
+    graph = []
+    for i, clip in enumerate(clip_files):
+        inputs.extend(["-i", str(clip)])
+        graph.append(
+            f"[{i}:v]scale=1920:1080:force_original_aspect_ratio=decrease,"
+            f"pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,fps=30,format=yuv420p[v{i}]"
+        )
+        graph.append(f"[{i}:a]aformat=sample_rates=44100:channel_layouts=stereo[a{i}]")
+
+    count = len(clip_files)
+    streams = "".join(f"[v{i}][a{i}]" for i in range(count))
+    graph.append(f"{streams}concat=n={count}:v=1:a=1[v][a]")
+
+    return [
+        ffmpeg, "-y",
+        "-loglevel", "error", "-nostats",
+        *inputs,
+        "-filter_complex", ";".join(graph),
+        "-map", "[v]",
+        "-map", "[a]",
+        *get_encoder_args(get_video_encoder()),
+        "-c:a", "aac",
+        "-b:a", "192k",
+        output_path
+    ]
 
 
 def generate_chapters(clips_dir: str, segments_file: str, output_path: str) -> None:
@@ -115,9 +358,35 @@ def generate_chapters(clips_dir: str, segments_file: str, output_path: str) -> N
     """
     data = load_segments(segments_file)
     clips_path = Path(clips_dir)
-    output = Path(output_path)
 
-    chapters_file = output.with_suffix(".chapters.txt")
+    # Clip durations (from the sidecars written by create_segment when
+    # present, otherwise ffprobe)
+    clip_names = scan_clips(clips_path)
+    clip_files = {}
+    for segment, chapter in get_all_segments(data):
+        clip_file = clips_path / f"{segment['segment_id']}.mp4"
+        if clip_file.name in clip_names:
+            clip_files[segment["segment_id"]] = str(clip_file)
+    clip_durations = get_durations(list(clip_files.values()))
+    durations = {
+        segment_id: clip_durations[clip_file]
+        for segment_id, clip_file in clip_files.items()
+    }
+
+    write_chapters(data, durations, output_path)
+
+
+def write_chapters(data: dict, durations: dict, output_path: str) -> None:
+    """
+    Write a YouTube chapter markers file from known segment durations.
+
+    Args:
+        data: Parsed segments.json dictionary
+        durations: Mapping of segment_id to duration in seconds (segments
+            missing from the mapping are treated as absent from the video)
+        output_path: Path to the output video (chapters file will be alongside)
+    """
+    chapters_file = Path(output_path).with_suffix(".chapters.txt")
 
     chapters = []
     current_time = 0.0
@@ -128,10 +397,7 @@ def generate_chapters(clips_dir: str, segments_file: str, output_path: str) -> N
 
         # Calculate chapter duration from its segments
         for segment in chapter.get("segments", []):
-            clip_file = clips_path / f"{segment['segment_id']}.mp4"
-            if clip_file.exists():
-                duration = get_video_duration(str(clip_file))
-                current_time += duration
+            current_time += durations.get(segment["segment_id"], 0.0)
 
         chapters.append((chapter_start, chapter_title))
 
@@ -144,19 +410,166 @@ def generate_chapters(clips_dir: str, segments_file: str, output_path: str) -> N
     print(f"Chapter markers saved to {chapters_file}")
 
 
+def assemble_direct(
+    segments_file: str,
+    images_dir: str,
+    audio_dir: str,
+    output_path: str,
+) -> bool:
+    """
+    Encode the final video straight from images and audio in one FFmpeg pass.
+
+    Skips the intermediate per-segment clips entirely: every image and
+    narration file becomes an input of a single filtergraph that renders each
+    segment and concatenates them. Intended for projects with at most
+    MAX_DIRECT_SEGMENTS segments. Background music is not mixed in this mode.
+
+    Args:
+        segments_file: Path to segments.json
+        images_dir: Directory containing images
+        audio_dir: Directory containing audio files
+        output_path: Path for the final video
+
+    Returns:
+        True if successful, False otherwise
+    """
+    ffmpeg = get_ffmpeg_path()
+    if not ffmpeg:
+        print("Error: FFmpeg not found. Please install FFmpeg.")
+        return False
+
+    load_dotenv()
+    padding_start = float(os.getenv("DEFAULT_PADDING_START", "0.5"))
+    padding_end = float(os.getenv("DEFAULT_PADDING_END", "0.5"))
+
+    data = load_segments(segments_file)
+    images_path = Path(images_dir)
+    audio_path = Path(audio_dir)
+    output = Path(output_path)
+    ensure_dir(output.parent)
+
+    fps = 30
+    delay_ms = int(padding_start * 1000)
+
+    # Collect segments that have both an image and narration audio
+    found = []
+    for segment, chapter in get_all_segments(data):
+        segment_id = segment["segment_id"]
+        image_file = images_path / f"{segment_id}.png"
+        audio_file = audio_path / f"{segment_id}.mp3"
+
+        if not image_file.exists() or not audio_file.exists():
+            print(f"Warning: Missing image or audio for {segment_id}")
+            continue
+
+        if should_use_ken_burns(segment, chapter):
+            effects = segment.get("ken_burns_sequence", [])
+        else:
+            effects = []
+
+        found.append((segment_id, str(image_file), str(audio_file), effects))
+
+    # Look durations up together, so audio without a sidecar is probed in parallel
+    audio_durations = get_durations([audio for _, _, audio, _ in found])
+    parts = [
+        (segment_id, image, audio, effects,
+         audio_durations[audio] + padding_start + padding_end)
+        for segment_id, image, audio, effects in found
+    ]
+
+    if not parts:
+        print("Error: No segments with both image and audio found")
+        return False
+
+    if len(parts) > MAX_DIRECT_SEGMENTS:
+        print(
+            f"Error: {len(parts)} segments exceeds the direct mode limit of "
+            f"{MAX_DIRECT_SEGMENTS}; create clips and assemble them instead"
+        )
+        return False
+
+    count = len(parts)
+    print(f"Encoding {count} segments in a single pass...")
+
+    # Inputs: all images first, then all narration files
+    inputs = []
+    for _, image_file, _, effects, duration in parts:
+        inputs.extend(build_image_input(image_file, effects, duration, fps))
+    for _, _, audio_file, _, _ in parts:
+        inputs.extend(["-i", audio_file])
+
+    # Render each segment to a labelled stream, then concatenate them all
+    graph = []
+    for i, (_, _, _, effects, duration) in enumerate(parts):
+        graph.append(build_video_graph(effects, duration, fps, source=f"{i}:v", output=f"v{i}"))
+        graph.append(
+            f"[{count + i}:a]adelay={delay_ms}|{delay_ms},apad=pad_dur={padding_end},"
+            f"atrim=duration={duration},"
+            f"aformat=sample_rates=44100:channel_layouts=stereo[a{i}]"
+        )
+    streams = "".join(f"[v{i}][a{i}]" for i in range(count))
+    graph.append(f"{streams}concat=n={count}:v=1:a=1[v][a]")
+
+    cmd = [
+        ffmpeg, "-y",
+        "-loglevel", "error", "-nostats",
+        *inputs,
+        "-filter_complex", ";".join(graph),
+        "-map", "[v]",
+        "-map", "[a]",
+        *get_encoder_args(get_video_encoder()),
+        "-c:a", "aac",
+        "-b:a", "192k",
+        str(output)
+    ]
+
+    try:
+        returncode, log = run_ffmpeg(cmd)
+
+        if returncode != 0:
+            print(f"FFmpeg error: {log}")
+            return False
+
+        durations = {segment_id: duration for segment_id, _, _, _, duration in parts}
+        write_chapters(data, durations, str(output))
+
+        return True
+
+    except Exception as e:
+        print(f"Error assembling video: {e}")
+        return False
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Assemble video segments into final video"
     )
 
-    parser.add_argument("--clips-dir", required=True, help="Directory with video clips")
+    parser.add_argument("--clips-dir", help="Directory with video clips")
     parser.add_argument("--output", required=True, help="Output video path")
     parser.add_argument("--segments", help="Path to segments.json (for ordering and chapters)")
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="Encode straight from images and audio in one pass (skips clips)"
+    )
+    parser.add_argument("--images-dir", help="Directory with images (--direct mode)")
+    parser.add_argument("--audio-dir", help="Directory with audio (--direct mode)")
 
     args = parser.parse_args()
 
-    print("Assembling final video...")
-    success = assemble_video(args.clips_dir, args.output, args.segments)
+    if args.direct:
+        if not (args.segments and args.images_dir and args.audio_dir):
+            parser.error("--direct requires --segments, --images-dir and --audio-dir")
+
+        print("Assembling final video directly from images and audio...")
+        success = assemble_direct(args.segments, args.images_dir, args.audio_dir, args.output)
+    else:
+        if not args.clips_dir:
+            parser.error("--clips-dir is required unless --direct is used")
+
+        print("Assembling final video...")
+        success = assemble_video(args.clips_dir, args.output, args.segments)
 
     if success:
         print(f"Final video saved to {args.output}")
@@ -6,8 +6,10 @@ Uses FFmpeg for video processing.
 """
 
 import argparse
+import functools
 import os
-import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -18,8 +20,34 @@ from utils import (
     get_all_segments,
     get_audio_duration,
     should_use_ken_burns,
+    compute_inputs_hash,
+    load_manifest,
+    save_manifest,
+    is_up_to_date,
     check_ffmpeg,
     get_ffmpeg_path,
+    get_video_encoder,
+    get_encoder_args,
+    run_ffmpeg,
+    probe_stream_params,
+    write_duration,
+)
+
+
+# Threads given to each libx264 process. batch_create sizes its worker pool so
+# that workers * FFMPEG_THREADS roughly matches the number of CPU cores.
+FFMPEG_THREADS = 2
+
+# Default worker count with a hardware encoder. Consumer GPUs limit concurrent
+# encode sessions, and extra processes would only fail or queue on the device.
+HARDWARE_ENCODER_WORKERS = 2
+
+
+# Filter for segments without Ken Burns effects: fit the image inside
+# 1920x1080 and letterbox the remainder
+STATIC_FILTER = (
+    "scale=1920:1080:force_original_aspect_ratio=decrease,"
+    "pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1"
 )
 
 
@@ -78,10 +106,25 @@ KEN_BURNS_EFFECTS = {
 }
 
 
+# KEN_BURNS_EFFECTS flattened to (start_zoom, end_zoom, start_x, end_x,
+# start_y, end_y) tuples for a single lookup + unpack per filter build
+_EFFECT_TABLE = {
+    name: (
+        effect["start_zoom"], effect["end_zoom"],
+        effect["start_x"], effect["end_x"],
+        effect["start_y"], effect["end_y"],
+    )
+    for name, effect in KEN_BURNS_EFFECTS.items()
+}
+
+
 def build_zoompan_filter(effect_name: str, duration: float, fps: int = 30) -> str:
     """
     Build FFmpeg zoompan filter string for a Ken Burns effect.
 
+    The duration is rounded to a whole number of frames, so segments of
+    near-identical length share a cached filter string.
+
     Args:
         effect_name: Name of the effect (zoom_in, pan_left, etc.)
         duration: Duration in seconds
@@ -90,23 +133,21 @@ def build_zoompan_filter(effect_name: str, duration: float, fps: int = 30) -> st
     Returns:
         FFmpeg filter string
     """
-    effect = KEN_BURNS_EFFECTS.get(effect_name)
-    if not effect:
-        # Default to static if unknown effect
-        return f"zoompan=z=1:d={int(duration * fps)}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s=1920x1080:fps={fps}"
+    return _build_zoompan_filter(effect_name, round(duration * fps), fps)
 
-    total_frames = int(duration * fps)
 
-    # Calculate zoom interpolation
-    sz = effect["start_zoom"]
-    ez = effect["end_zoom"]
+@functools.lru_cache(maxsize=256)
+def _build_zoompan_filter(effect_name: str, total_frames: int, fps: int) -> str:
+    """Memoized implementation of build_zoompan_filter, taking a frame count."""
 
-    # Calculate position interpolation (in pixels, relative to zoomed frame)
-    # x and y represent the top-left corner of the output frame
-    sx = effect["start_x"]
-    ex = effect["end_x"]
-    sy = effect["start_y"]
-    ey = effect["end_y"]
+    effect = _EFFECT_TABLE.get(effect_name)
+    if not effect:
+        # Default to static if unknown effect
+        return f"zoompan=z=1:d={total_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s=1920x1080:fps={fps}"
+
+    # Zoom interpolates from sz to ez; positions (relative, 0.5 = center)
+    # from (sx, sy) to (ex, ey)
+    sz, ez, sx, ex, sy, ey = effect
 
     # Build the zoompan filter with linear interpolation
     # zoom goes from sz to ez
@@ -118,6 +159,86 @@ def build_zoompan_filter(effect_name: str, duration: float, fps: int = 30) -> st
     return f"zoompan=z='{zoom_expr}':x='{x_expr}':y='{y_expr}':d={total_frames}:s=1920x1080:fps={fps}"
 
 
+def build_video_graph(
+    effects: list,
+    duration: float,
+    fps: int = 30,
+    source: str = "0:v",
+    output: str = "v",
+) -> str:
+    """
+    Build the filtergraph that turns a still image into a 1920x1080 clip.
+
+    Multiple Ken Burns effects are chained in the same graph: the image is
+    split into one branch per effect, each branch renders its share of the
+    duration, and the branches are concatenated. Internal labels are derived
+    from `output`, so several graphs can share one -filter_complex.
+
+    Args:
+        effects: List of Ken Burns effects to apply (empty = static image)
+        duration: Clip duration in seconds
+        fps: Frames per second
+        source: Input stream label (without brackets)
+        output: Output stream label (without brackets)
+
+    Returns:
+        FFmpeg filtergraph string producing a yuv420p stream labelled `output`
+    """
+    if not effects:
+        # Static image - just scale/letterbox to 1920x1080. zoompan is not needed
+        # since the looped input already produces frames at the target rate.
+        return f"[{source}]{STATIC_FILTER},format=yuv420p[{output}]"
+
+    total_frames = round(duration * fps)
+    if len(effects) == 1:
+        zoompan = _build_zoompan_filter(effects[0], total_frames, fps)
+        return f"[{source}]{zoompan},setsar=1,format=yuv420p[{output}]"
+
+    # Split the frames among effects; the last branch takes the remainder so
+    # the branches add up to exactly the clip length
+    count = len(effects)
+    effect_frames = total_frames // count
+
+    branches = "".join(f"[{output}_in{i}]" for i in range(count))
+    graph = [f"[{source}]split={count}{branches}"]
+    for i, effect in enumerate(effects):
+        frames = effect_frames if i < count - 1 else total_frames - effect_frames * (count - 1)
+        zoompan = _build_zoompan_filter(effect, frames, fps)
+        graph.append(f"[{output}_in{i}]{zoompan},setsar=1[{output}_fx{i}]")
+
+    rendered = "".join(f"[{output}_fx{i}]" for i in range(count))
+    graph.append(f"{rendered}concat=n={count}:v=1:a=0,format=yuv420p[{output}]")
+
+    return ";".join(graph)
+
+
+def build_image_input(image_path: str, effects: list, duration: float, fps: int = 30) -> list:
+    """
+    Build the FFmpeg input arguments for a still image.
+
+    zoompan synthesizes all of its frames from a single input frame, so Ken
+    Burns segments read the image once. Static images are looped at the output
+    frame rate and cut to length on the input side.
+
+    Args:
+        image_path: Path to the image file
+        effects: List of Ken Burns effects to apply (empty = static image)
+        duration: Clip duration in seconds
+        fps: Frames per second
+
+    Returns:
+        List of FFmpeg input arguments
+    """
+    if effects:
+        return ["-i", image_path]
+    return [
+        "-loop", "1",
+        "-framerate", str(fps),
+        "-t", str(duration),
+        "-i", image_path,
+    ]
+
+
 def create_segment(
     image_path: str,
     audio_path: str,
@@ -127,6 +248,7 @@ def create_segment(
     music_volume: float = 0.15,
     padding_start: float = 0.5,
     padding_end: float = 0.5,
+    encoder: str = None,
 ) -> bool:
     """
     Create a video segment from an image and audio file.
@@ -140,6 +262,7 @@ def create_segment(
         music_volume: Volume of background music (0.0-1.0)
         padding_start: Seconds of padding before narration
         padding_end: Seconds of padding after narration
+        encoder: H.264 encoder name (default: auto-detected, see get_video_encoder)
 
     Returns:
         True if successful, False otherwise
@@ -156,47 +279,40 @@ def create_segment(
     fps = 30
     effects = effects or []
 
-    # Build video filter
-    if effects:
-        # Split duration among effects
-        effect_duration = total_duration / len(effects)
-        filters = []
-        for effect in effects:
-            filters.append(build_zoompan_filter(effect, effect_duration, fps))
-
-        # For multiple effects, we'd need to concat them, but for simplicity
-        # we'll just use the first effect for the full duration
-        if len(effects) == 1:
-            video_filter = filters[0]
-        else:
-            # Use first effect - TODO: implement effect chaining
-            video_filter = build_zoompan_filter(effects[0], total_duration, fps)
-    else:
-        # Static image - just scale to 1920x1080
-        total_frames = int(total_duration * fps)
-        video_filter = f"zoompan=z=1:d={total_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s=1920x1080:fps={fps}"
+    image_input = build_image_input(image_path, effects, total_duration, fps)
+    video_graph = build_video_graph(effects, total_duration, fps)
+
+    # Hardware encoders manage their own threading
+    encoder = encoder or get_video_encoder()
+    video_args = get_encoder_args(encoder)
+    if encoder == "libx264":
+        video_args += ["-threads", str(FFMPEG_THREADS)]
+
+    use_music = bool(music_path and Path(music_path).exists())
+
+    # With music, amix ends on the (delayed) narration and -shortest trims the
+    # video to it, so the trailing padding is not part of the clip.
+    clip_duration = audio_duration + padding_start if use_music else total_duration
 
     try:
-        if music_path and Path(music_path).exists():
+        if use_music:
             # With background music
             # Create audio mix: narration (delayed by padding_start) + music
             cmd = [
                 ffmpeg, "-y",
-                "-loop", "1",
-                "-i", image_path,
+                "-loglevel", "error", "-nostats",
+                *image_input,
                 "-i", audio_path,
                 "-i", music_path,
                 "-filter_complex",
-                f"[0:v]{video_filter},format=yuv420p[v];"
+                f"{video_graph};"
                 f"[1:a]adelay={int(padding_start * 1000)}|{int(padding_start * 1000)}[narration];"
                 f"[2:a]volume={music_volume},aloop=loop=-1:size=2e+09[music];"
                 f"[narration][music]amix=inputs=2:duration=first:dropout_transition=2[a]",
                 "-map", "[v]",
                 "-map", "[a]",
                 "-t", str(total_duration),
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "23",
+                *video_args,
                 "-c:a", "aac",
                 "-b:a", "192k",
                 "-shortest",
@@ -206,29 +322,38 @@ def create_segment(
             # Without background music
             cmd = [
                 ffmpeg, "-y",
-                "-loop", "1",
-                "-i", image_path,
+                "-loglevel", "error", "-nostats",
+                *image_input,
                 "-i", audio_path,
                 "-filter_complex",
-                f"[0:v]{video_filter},format=yuv420p[v];"
+                f"{video_graph};"
                 f"[1:a]adelay={int(padding_start * 1000)}|{int(padding_start * 1000)},apad=pad_dur={padding_end}[a]",
                 "-map", "[v]",
                 "-map", "[a]",
                 "-t", str(total_duration),
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "23",
+                *video_args,
                 "-c:a", "aac",
                 "-b:a", "192k",
                 output_path
             ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        returncode, log = run_ffmpeg(cmd)
 
-        if result.returncode != 0:
-            print(f"  FFmpeg error: {result.stderr}")
+        if returncode != 0:
+            print(f"  FFmpeg error: {log}")
             return False
 
+        # Record the clip's codec parameters and real length, so assembly can
+        # check that clips may be stream-copied and place chapters without
+        # probing each one. The real length differs from clip_duration (AAC
+        # priming and padding, zoompan frame rounding), and the concat demuxer
+        # offsets each clip by the real length.
+        try:
+            probe_stream_params(output_path)
+        except RuntimeError:
+            # No ffprobe: the planned length is the best estimate available
+            write_duration(output_path, clip_duration)
+
         return True
 
     except Exception as e:
@@ -236,24 +361,50 @@ def create_segment(
         return False
 
 
+def _timed_create_segment(**kwargs) -> tuple:
+    """
+    Pool worker: run create_segment and measure how long it took.
+
+    Returns:
+        Tuple of (success, elapsed seconds)
+    """
+    start = time.perf_counter()
+    success = create_segment(**kwargs)
+    return success, time.perf_counter() - start
+
+
+def default_workers(encoder: str = "libx264") -> int:
+    """Number of concurrent ffmpeg processes that saturates the encoder."""
+    if encoder != "libx264":
+        return HARDWARE_ENCODER_WORKERS
+    return max(1, (os.cpu_count() or 1) // FFMPEG_THREADS)
+
+
 def batch_create(
     segments_file: str,
     images_dir: str,
     audio_dir: str,
     output_dir: str,
     music_dir: str = None,
+    workers: int = None,
 ) -> None:
     """
     Create video segments for all entries in segments.json.
 
+    Segments are encoded concurrently in a process pool. Existing clips are
+    only re-encoded when their image, audio or settings changed (tracked in
+    the output directory's manifest).
+
     Args:
         segments_file: Path to segments.json
         images_dir: Directory containing images
         audio_dir: Directory containing audio files
         output_dir: Directory to save video segments
         music_dir: Directory containing music files
+        workers: Number of parallel ffmpeg processes (default: CPU count /
+            FFMPEG_THREADS with libx264, HARDWARE_ENCODER_WORKERS otherwise)
     """
-    # Load environment defaults
+    # Load environment defaults once here; workers receive them as arguments
     load_dotenv()
     padding_start = float(os.getenv("DEFAULT_PADDING_START", "0.5"))
     padding_end = float(os.getenv("DEFAULT_PADDING_END", "0.5"))
@@ -270,15 +421,13 @@ def batch_create(
 
     print(f"Creating {total} video segments...")
 
+    # Collect pending jobs, skipping finished or incomplete segments up front
+    manifest = load_manifest(output_path)
+    jobs = []
     for i, (segment, chapter) in enumerate(segments, 1):
         segment_id = segment["segment_id"]
         video_file = output_path / f"{segment_id}.mp4"
 
-        # Skip if already exists
-        if video_file.exists():
-            print(f"[{i}/{total}] Skipping {segment_id} (already exists)")
-            continue
-
         image_file = images_path / f"{segment_id}.png"
         audio_file = audio_path / f"{segment_id}.mp3"
 
@@ -290,8 +439,6 @@ def batch_create(
             print(f"[{i}/{total}] Skipping {segment_id} (audio not found)")
             continue
 
-        print(f"[{i}/{total}] Creating {segment_id}...")
-
         # Determine Ken Burns effects
         if should_use_ken_burns(segment, chapter):
             effects = segment.get("ken_burns_sequence", [])
@@ -309,21 +456,84 @@ def batch_create(
                 music_file = str(potential_music)
                 music_volume = chapter.get("music_volume", default_music_volume)
 
-        success = create_segment(
-            str(image_file),
-            str(audio_file),
-            str(video_file),
+        # Skip if already created from the same image, audio and settings.
+        # Hashing the file contents means regenerated images or audio
+        # invalidate the clip.
+        inputs_hash = compute_inputs_hash(
+            {
+                "effects": effects,
+                "music": music_file,
+                "music_volume": music_volume,
+                "padding_start": padding_start,
+                "padding_end": padding_end,
+            },
+            files=[image_file, audio_file],
+        )
+        if is_up_to_date(video_file, manifest, segment_id, inputs_hash):
+            print(f"[{i}/{total}] Skipping {segment_id} (up to date)")
+            continue
+
+        jobs.append((segment_id, video_file, inputs_hash, dict(
+            image_path=str(image_file),
+            audio_path=str(audio_file),
+            output_path=str(video_file),
             effects=effects,
             music_path=music_file,
             music_volume=music_volume,
             padding_start=padding_start,
             padding_end=padding_end,
+        )))
+
+    if not jobs:
+        save_manifest(output_path, manifest)
+        print("Done!")
+        return
+
+    # Detect the encoder once here rather than in every worker process
+    encoder = get_video_encoder()
+    workers = min(workers or default_workers(encoder), len(jobs))
+    pending = len(jobs)
+    print(f"Encoding {pending} segments with {workers} workers ({encoder})...")
+
+    # Progress is reported only from this process as results arrive, so
+    # lines from concurrent workers never interleave
+    timings = {}
+    batch_start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_timed_create_segment, encoder=encoder, **kwargs): (
+                segment_id, video_file, inputs_hash
+            )
+            for segment_id, video_file, inputs_hash, kwargs in jobs
+        }
+
+        for done, future in enumerate(as_completed(futures), 1):
+            segment_id, video_file, inputs_hash = futures[future]
+            try:
+                success, elapsed = future.result()
+            except Exception as e:
+                print(f"[{done}/{pending}] Error creating {segment_id}: {e}")
+                continue
+
+            if success:
+                timings[segment_id] = elapsed
+                manifest[segment_id] = {"inputs_sha256": inputs_hash}
+                print(f"[{done}/{pending}] Saved {segment_id} to {video_file} ({elapsed:.1f}s)")
+            else:
+                print(f"[{done}/{pending}] Failed to create {segment_id}")
+
+    wall_time = time.perf_counter() - batch_start
+    if timings:
+        slowest = max(timings, key=timings.get)
+        print(
+            f"Encoded {len(timings)}/{pending} segments in {wall_time:.1f}s "
+            f"({len(timings) / wall_time * 60:.1f} segments/min, "
+            f"avg {sum(timings.values()) / len(timings):.1f}s per segment, "
+            f"slowest {slowest} at {timings[slowest]:.1f}s)"
         )
 
-        if success:
-            print(f"  Saved to {video_file}")
-        else:
-            print(f"  Failed to create {segment_id}")
+    save_manifest(output_path, manifest)
 
     print("Done!")
 
@@ -352,6 +562,11 @@ def main():
     batch.add_argument("--audio-dir", required=True, help="Directory with audio")
     batch.add_argument("--output-dir", required=True, help="Output directory")
     batch.add_argument("--music-dir", help="Directory with music files")
+    batch.add_argument(
+        "--workers",
+        type=int,
+        help="Parallel ffmpeg processes (default: CPU count / 2, or 2 with a hardware encoder)"
+    )
 
     args = parser.parse_args()
 
@@ -377,6 +592,7 @@ def main():
             args.audio_dir,
             args.output_dir,
             args.music_dir,
+            workers=args.workers,
         )
 
     else:
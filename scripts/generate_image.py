@@ -6,68 +6,218 @@ Supports single image generation and batch processing from segments.json.
 """
 
 import argparse
+import asyncio
 import os
+import sys
 import time
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
-from utils import load_segments, ensure_dir, get_all_segments
+from utils import (
+    load_segments,
+    ensure_dir,
+    get_all_segments,
+    compute_inputs_hash,
+    load_manifest,
+    save_manifest,
+    is_up_to_date,
+)
 
 
-def generate_image(prompt: str, output_path: str, api_key: str) -> bool:
+IMAGE_MODEL = "nano-banana-pro-preview"
+
+# Retries for rate-limited (HTTP 429) requests, with exponential backoff
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 2.0
+
+
+def _image_config() -> types.GenerateContentConfig:
+    """Request config for Nano Banana Pro, which uses the IMAGE modality."""
+    return types.GenerateContentConfig(response_modalities=["IMAGE"])
+
+
+def _save_image(response, output_path: str) -> bool:
+    """Write the first inline image of a response to disk."""
+    if response.candidates and response.candidates[0].content.parts:
+        part = response.candidates[0].content.parts[0]
+        if hasattr(part, 'inline_data') and part.inline_data:
+            # Save the image data
+            with open(output_path, 'wb') as f:
+                f.write(part.inline_data.data)
+            return True
+
+    print(f"  No image generated for prompt")
+    return False
+
+
+def generate_image(prompt: str, output_path: str, client: genai.Client) -> bool:
     """
     Generate a single image from a text prompt using Nano Banana Pro.
 
     Args:
         prompt: The image generation prompt
         output_path: Path to save the generated image
-        api_key: Gemini API key
+        client: Gemini API client (reused across calls)
 
     Returns:
         True if successful, False otherwise
     """
-    client = genai.Client(api_key=api_key)
-
     try:
-        # Nano Banana Pro uses generate_content with IMAGE modality
         response = client.models.generate_content(
-            model="nano-banana-pro-preview",
+            model=IMAGE_MODEL,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["IMAGE"],
-            ),
+            config=_image_config(),
         )
-
-        # Extract image from response
-        if response.candidates and response.candidates[0].content.parts:
-            part = response.candidates[0].content.parts[0]
-            if hasattr(part, 'inline_data') and part.inline_data:
-                # Save the image data
-                image_data = part.inline_data.data
-                with open(output_path, 'wb') as f:
-                    f.write(image_data)
-                return True
-
-        print(f"  No image generated for prompt")
-        return False
+        return _save_image(response, output_path)
 
     except Exception as e:
         print(f"  Error generating image: {e}")
         return False
 
 
-def batch_generate(segments_file: str, output_dir: str, api_key: str, delay: float = 2.0) -> None:
+async def generate_image_async(prompt: str, output_path: str, client: genai.Client) -> bool:
+    """
+    Async variant of generate_image that retries rate-limited requests.
+
+    Args:
+        prompt: The image generation prompt
+        output_path: Path to save the generated image
+        client: Gemini API client (reused across calls)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = await client.aio.models.generate_content(
+                model=IMAGE_MODEL,
+                contents=prompt,
+                config=_image_config(),
+            )
+            return _save_image(response, output_path)
+
+        except errors.APIError as e:
+            if e.code == 429 and attempt < MAX_RETRIES:
+                await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+                continue
+            print(f"  Error generating image: {e}")
+            return False
+
+        except Exception as e:
+            print(f"  Error generating image: {e}")
+            return False
+
+    return False
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each
+    acquire() takes one token and only waits when the bucket is empty, so time
+    already spent waiting on slow responses counts towards the next request.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate: Requests allowed per second
+            capacity: Maximum burst of back-to-back requests
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent, then consume one token."""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1.0
+                self._last = time.monotonic()
+
+            self._tokens -= 1
+
+
+async def _generate_pending(
+    pending: list,
+    client: genai.Client,
+    limiter: Optional[TokenBucket],
+    concurrency: int
+) -> list:
+    """
+    Generate pending images concurrently.
+
+    Args:
+        pending: List of (segment_id, prompt, image_file) tuples
+        client: Gemini API client
+        limiter: Rate limiter shared by all requests (None for no limit)
+        concurrency: Maximum number of requests in flight
+
+    Returns:
+        IDs of the segments that were generated successfully
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate_one(segment_id: str, prompt: str, image_file: Path):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            success = await generate_image_async(prompt, str(image_file), client)
+        return segment_id, image_file, success
+
+    total = len(pending)
+    tasks = [generate_one(*job) for job in pending]
+    succeeded = []
+
+    for done, task in enumerate(asyncio.as_completed(tasks), 1):
+        segment_id, image_file, success = await task
+        if success:
+            succeeded.append(segment_id)
+            print(f"[{done}/{total}] Saved {segment_id} to {image_file}")
+        else:
+            print(f"[{done}/{total}] Failed to generate {segment_id}")
+
+    return succeeded
+
+
+def batch_generate(
+    segments_file: str,
+    output_dir: str,
+    api_key: str,
+    delay: float = 2.0,
+    concurrency: int = 4,
+    qps: float = None
+) -> None:
     """
     Generate images for all segments in a segments.json file.
 
+    Uses one shared client and keeps up to `concurrency` requests in flight,
+    rate limited by a token bucket.
+    Existing images are only regenerated when their prompt changed (tracked in
+    the output directory's manifest).
+
     Args:
         segments_file: Path to segments.json
         output_dir: Directory to save images
         api_key: Gemini API key
-        delay: Delay between API calls in seconds
+        delay: Minimum interval between requests in seconds (ignored if qps is
+            set; 0 or less means no limit)
+        concurrency: Maximum number of requests in flight
+        qps: Requests per second allowed by the API quota
     """
     data = load_segments(segments_file)
     output_path = ensure_dir(Path(output_dir))
@@ -77,36 +227,65 @@ def batch_generate(segments_file: str, output_dir: str, api_key: str, delay: flo
 
     print(f"Generating {total} images...")
 
+    manifest = load_manifest(output_path)
+    hashes = {}
+    pending = []
     for i, (segment, chapter) in enumerate(segments, 1):
         segment_id = segment["segment_id"]
         image_file = output_path / f"{segment_id}.png"
 
-        # Skip if already exists
-        if image_file.exists():
-            print(f"[{i}/{total}] Skipping {segment_id} (already exists)")
-            continue
-
         prompt = segment.get("image_prompt", "")
         if not prompt:
             print(f"[{i}/{total}] Skipping {segment_id} (no prompt)")
             continue
 
-        print(f"[{i}/{total}] Generating {segment_id}...")
+        # Skip if already generated from the same prompt
+        inputs_hash = compute_inputs_hash({"prompt": prompt, "model": IMAGE_MODEL})
+        if is_up_to_date(image_file, manifest, segment_id, inputs_hash):
+            print(f"[{i}/{total}] Skipping {segment_id} (up to date)")
+            continue
 
-        success = generate_image(prompt, str(image_file), api_key)
+        hashes[segment_id] = inputs_hash
+        pending.append((segment_id, prompt, image_file))
 
-        if success:
-            print(f"  Saved to {image_file}")
-        else:
-            print(f"  Failed to generate {segment_id}")
+    if pending:
+        print(f"Requesting {len(pending)} images ({concurrency} in flight)...")
+        client = genai.Client(api_key=api_key)
+        rate = qps or (1.0 / delay if delay > 0 else None)
+        limiter = TokenBucket(rate) if rate else None
+        succeeded = asyncio.run(
+            _generate_pending(pending, client, limiter, max(1, concurrency))
+        )
+        for segment_id in succeeded:
+            manifest[segment_id] = {"inputs_sha256": hashes[segment_id]}
 
-        # Delay between requests to avoid rate limiting
-        if i < total:
-            time.sleep(delay)
+    save_manifest(output_path, manifest)
 
     print("Done!")
 
 
+def _positive_float(value: str) -> float:
+    """argparse type for a number greater than zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a number")
+    if not 0 < number < float("inf"):
+        raise argparse.ArgumentTypeError(f"{value!r} must be greater than 0")
+    return number
+
+
+def _env_qps() -> Optional[float]:
+    """Read GEMINI_QPS; empty, whitespace-only or zero values mean not set."""
+    value = os.getenv("GEMINI_QPS", "").strip()
+    try:
+        if not value or float(value) == 0:
+            return None
+    except ValueError:
+        pass  # Reported by _positive_float below
+    return _positive_float(value)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate images using Gemini API (Imagen 3)"
@@ -122,7 +301,13 @@ def main():
     batch = subparsers.add_parser("batch", help="Batch generate from segments.json")
     batch.add_argument("--segments", required=True, help="Path to segments.json")
     batch.add_argument("--output-dir", required=True, help="Output directory for images")
-    batch.add_argument("--delay", type=float, default=2.0, help="Delay between API calls (seconds)")
+    batch.add_argument("--delay", type=float, default=2.0, help="Delay between API calls (seconds, 0 for no limit)")
+    batch.add_argument("--concurrency", type=int, default=4, help="Maximum requests in flight")
+    batch.add_argument(
+        "--qps",
+        type=_positive_float,
+        help="Requests per second (overrides --delay; default: GEMINI_QPS env var)"
+    )
 
     args = parser.parse_args()
 
@@ -137,14 +322,28 @@ def main():
 
     if args.command == "single":
         print(f"Generating image...")
-        success = generate_image(args.prompt, args.output, api_key)
+        success = generate_image(args.prompt, args.output, genai.Client(api_key=api_key))
         if success:
             print(f"Saved to {args.output}")
         else:
             print("Failed to generate image")
 
     elif args.command == "batch":
-        batch_generate(args.segments, args.output_dir, api_key, args.delay)
+        qps = args.qps
+        if qps is None:
+            try:
+                qps = _env_qps()
+            except argparse.ArgumentTypeError as e:
+                print(f"Error: invalid GEMINI_QPS in environment variables ({e})")
+                sys.exit(1)
+        batch_generate(
+            args.segments,
+            args.output_dir,
+            api_key,
+            args.delay,
+            concurrency=args.concurrency,
+            qps=qps
+        )
 
     else:
         parser.print_help()
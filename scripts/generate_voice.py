@@ -13,7 +13,16 @@ from pathlib import Path
 import edge_tts
 from dotenv import load_dotenv
 
-from utils import load_segments, ensure_dir, get_all_segments
+from utils import (
+    load_segments,
+    ensure_dir,
+    get_all_segments,
+    compute_inputs_hash,
+    load_manifest,
+    save_manifest,
+    is_up_to_date,
+    record_audio_duration,
+)
 
 
 async def generate_voice_async(
@@ -37,6 +46,8 @@ async def generate_voice_async(
     try:
         communicate = edge_tts.Communicate(text, voice, rate=rate)
         await communicate.save(output_path)
+        # Let create_segment skip probing the file
+        record_audio_duration(output_path)
         return True
     except Exception as e:
         print(f"  Error generating voice: {e}")
@@ -55,20 +66,66 @@ def generate_voice(
     return asyncio.run(generate_voice_async(text, output_path, voice, rate))
 
 
+async def _generate_pending(
+    pending: list,
+    voice: str,
+    rate: str,
+    concurrency: int
+) -> list:
+    """
+    Synthesize pending segments concurrently on a single event loop.
+
+    Args:
+        pending: List of (segment_id, narration, audio_file) tuples
+        voice: Edge TTS voice name
+        rate: Speech rate adjustment
+        concurrency: Maximum number of simultaneous Edge TTS connections
+
+    Returns:
+        IDs of the segments that were generated successfully
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate_one(segment_id: str, narration: str, audio_file: Path):
+        async with semaphore:
+            success = await generate_voice_async(narration, str(audio_file), voice, rate)
+        return segment_id, audio_file, success
+
+    total = len(pending)
+    tasks = [generate_one(*job) for job in pending]
+    succeeded = []
+
+    for done, task in enumerate(asyncio.as_completed(tasks), 1):
+        segment_id, audio_file, success = await task
+        if success:
+            succeeded.append(segment_id)
+            print(f"[{done}/{total}] Saved {segment_id} to {audio_file}")
+        else:
+            print(f"[{done}/{total}] Failed to generate {segment_id}")
+
+    return succeeded
+
+
 def batch_generate(
     segments_file: str,
     output_dir: str,
     voice: str = None,
-    rate: str = "+0%"
+    rate: str = "+0%",
+    concurrency: int = 8
 ) -> None:
     """
     Generate voice audio for all segments in a segments.json file.
 
+    Requests are sent to Edge TTS concurrently, bounded by `concurrency`.
+    Existing files are only regenerated when their narration, voice or rate
+    changed (tracked in the output directory's manifest).
+
     Args:
         segments_file: Path to segments.json
         output_dir: Directory to save audio files
         voice: Override voice (uses segments.json voice if not specified)
         rate: Speech rate adjustment
+        concurrency: Maximum number of simultaneous Edge TTS requests
     """
     data = load_segments(segments_file)
     output_path = ensure_dir(Path(output_dir))
@@ -81,28 +138,38 @@ def batch_generate(
 
     print(f"Generating {total} audio files with voice: {default_voice}...")
 
+    manifest = load_manifest(output_path)
+    hashes = {}
+    pending = []
     for i, (segment, chapter) in enumerate(segments, 1):
         segment_id = segment["segment_id"]
         audio_file = output_path / f"{segment_id}.mp3"
 
-        # Skip if already exists
-        if audio_file.exists():
-            print(f"[{i}/{total}] Skipping {segment_id} (already exists)")
-            continue
-
         narration = segment.get("narration", "")
         if not narration:
             print(f"[{i}/{total}] Skipping {segment_id} (no narration)")
             continue
 
-        print(f"[{i}/{total}] Generating {segment_id}...")
+        # Skip if already generated from the same inputs
+        inputs_hash = compute_inputs_hash(
+            {"narration": narration, "voice": default_voice, "rate": rate}
+        )
+        if is_up_to_date(audio_file, manifest, segment_id, inputs_hash):
+            print(f"[{i}/{total}] Skipping {segment_id} (up to date)")
+            continue
 
-        success = generate_voice(narration, str(audio_file), default_voice, rate)
+        hashes[segment_id] = inputs_hash
+        pending.append((segment_id, narration, audio_file))
 
-        if success:
-            print(f"  Saved to {audio_file}")
-        else:
-            print(f"  Failed to generate {segment_id}")
+    if pending:
+        print(f"Synthesizing {len(pending)} segments ({concurrency} at a time)...")
+        succeeded = asyncio.run(
+            _generate_pending(pending, default_voice, rate, max(1, concurrency))
+        )
+        for segment_id in succeeded:
+            manifest[segment_id] = {"inputs_sha256": hashes[segment_id]}
+
+    save_manifest(output_path, manifest)
 
     print("Done!")
 
@@ -162,6 +229,12 @@ def main():
         default=os.getenv("DEFAULT_SPEECH_RATE", "+0%"),
         help="Speech rate"
     )
+    batch.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum simultaneous Edge TTS requests"
+    )
 
     # List voices
     subparsers.add_parser("list-voices", help="List available voices")
@@ -177,7 +250,13 @@ def main():
             print("Failed to generate audio")
 
     elif args.command == "batch":
-        batch_generate(args.segments, args.output_dir, args.voice, args.rate)
+        batch_generate(
+            args.segments,
+            args.output_dir,
+            args.voice,
+            args.rate,
+            concurrency=args.concurrency
+        )
 
     elif args.command == "list-voices":
         list_voices()
@@ -5,13 +5,60 @@ Contains visual style definitions, concept-to-metaphor mappings, quality booster
 and prompt templates based on the Agentic AI Visual Prompt Engineering research.
 """
 
-from typing import Dict, List, Any
+import functools
+import re
+import sys
+import threading
+from itertools import chain, repeat
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, List, Any, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import ahocorasick  # Optional: pyahocorasick speeds up concept detection
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan  # Optional: SIMD multi-pattern matching for long texts
+except ImportError:
+    hyperscan = None
+
+
+def _freeze(table: Dict[str, Dict[str, Any]]) -> Mapping[str, Mapping[str, Any]]:
+    """
+    Make a two-level config table read-only.
+
+    Entries become MappingProxyType views and list values become tuples. The
+    lookup tables below are derived from these at import time, so changing
+    them at runtime would silently be ignored.
+
+    Names, field keys and string values (e.g. "default_style", which is
+    itself a VISUAL_STYLES key) are interned so repeated lookups compare by
+    identity.
+    """
+    return MappingProxyType({
+        sys.intern(name): MappingProxyType({
+            sys.intern(key): _freeze_value(value)
+            for key, value in entry.items()
+        })
+        for name, entry in table.items()
+    })
+
+
+def _freeze_value(value: Any) -> Any:
+    """Convert a config value to its immutable, interned form."""
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
 
 # ============================================================================
 # VISUAL STYLES
 # ============================================================================
 
-VISUAL_STYLES: Dict[str, Dict[str, Any]] = {
+VISUAL_STYLES: Mapping[str, Mapping[str, Any]] = _freeze({
     "minimalist": {
         "description": "Simple shapes, bright colors, no depth or texture",
         "keywords": ["flat design", "vector art", "minimalist", "simple shapes", "clean lines", "infographic style", "2D illustration", "solid colors"],
@@ -56,13 +103,13 @@ VISUAL_STYLES: Dict[str, Dict[str, Any]] = {
         "negative_prompts": ["cartoon", "illustration", "flat", "vector art", "low quality"],
         "best_for": ["hero shots", "high-impact visuals", "realism", "professional content"]
     }
-}
+})
 
 # ============================================================================
 # AGENTIC AI CONCEPTS
 # ============================================================================
 
-AGENTIC_CONCEPTS: Dict[str, Dict[str, Any]] = {
+AGENTIC_CONCEPTS: Mapping[str, Mapping[str, Any]] = _freeze({
     "agent": {
         "keywords": ["agent", "autonomous", "AI entity", "intelligent system"],
         "metaphors": ["robot", "digital entity", "glowing orb", "stylized figure"],
@@ -160,13 +207,13 @@ AGENTIC_CONCEPTS: Dict[str, Dict[str, Any]] = {
         "visual_keywords": ["data quality", "data cleansing", "data validation", "data integrity"],
         "default_style": "minimalist"
     }
-}
+})
 
 # ============================================================================
 # QUALITY BOOSTERS
 # ============================================================================
 
-QUALITY_BOOSTERS: List[str] = [
+QUALITY_BOOSTERS: Tuple[str, ...] = (
     "8K resolution",
     "hyper-detailed",
     "sharp focus",
@@ -175,13 +222,13 @@ QUALITY_BOOSTERS: List[str] = [
     "masterpiece",
     "high quality",
     "professional"
-]
+)
 
 # ============================================================================
 # NEGATIVE PROMPTS
 # ============================================================================
 
-NEGATIVE_PROMPTS: List[str] = [
+NEGATIVE_PROMPTS: Tuple[str, ...] = (
     "blurry",
     "deformed",
     "ugly",
@@ -200,7 +247,7 @@ NEGATIVE_PROMPTS: List[str] = [
     "jpeg artifacts",
     "noise",
     "grain"
-]
+)
 
 # ============================================================================
 # PROMPT TEMPLATES
@@ -228,11 +275,17 @@ PROMPT_TEMPLATES: Dict[str, str] = {
     "skill_9_security": "A massive, glowing, digital fortress with high walls and watchtowers. AI guardians, represented as knights of light, are defending the fortress from a swarm of dark, shadowy creatures attempting to breach the walls."
 }
 
+
+def render_master(subject: str, action: str, style: str, composition: str, quality: str) -> str:
+    """Fill the "master" template; same output as PROMPT_TEMPLATES["master"].format(...)."""
+    return f"{subject} - {action} - {style} - {composition} - {quality}"
+
+
 # ============================================================================
 # PLATFORM CONFIGURATIONS
 # ============================================================================
 
-PLATFORM_CONFIGS: Dict[str, Dict[str, Any]] = {
+PLATFORM_CONFIGS: Mapping[str, Mapping[str, Any]] = _freeze({
     "nano-banana-pro": {
         "aspect_ratio": "16:9",
         "style_param": "raw",
@@ -256,7 +309,7 @@ PLATFORM_CONFIGS: Dict[str, Dict[str, Any]] = {
         "aspect_ratio": "16:9",
         "format_string": ""  # Uses natural language with negative prompts
     }
-}
+})
 
 # ============================================================================
 # DEFAULT CONFIGURATION
@@ -273,73 +326,328 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "auto_style_selection": True
 }
 
+# ============================================================================
+# TYPED CONFIG VIEWS
+# ============================================================================
+# NamedTuples rather than dataclasses: same immutable attribute access, but
+# importing dataclasses (and inspect) would double this module's import time.
+
+class PromptConfig(NamedTuple):
+    """Generator settings; defaults match DEFAULT_CONFIG."""
+    default_style: str = DEFAULT_CONFIG["default_style"]
+    platform: str = DEFAULT_CONFIG["platform"]
+    aspect_ratio: str = DEFAULT_CONFIG["aspect_ratio"]
+    include_quality_boosters: bool = DEFAULT_CONFIG["include_quality_boosters"]
+    include_negative_prompts: bool = DEFAULT_CONFIG["include_negative_prompts"]
+    consistency_mode: str = DEFAULT_CONFIG["consistency_mode"]
+    concept_detection: bool = DEFAULT_CONFIG["concept_detection"]
+    auto_style_selection: bool = DEFAULT_CONFIG["auto_style_selection"]
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any]) -> "PromptConfig":
+        """Build a config from a (possibly partial) settings dict, ignoring unknown keys."""
+        return cls(**{key: value for key, value in config.items() if key in cls._fields})
+
+
+class StyleConfig(NamedTuple):
+    """Attribute view of a VISUAL_STYLES entry."""
+    description: str
+    keywords: Tuple[str, ...]
+    composition: Tuple[str, ...]
+    quality_boosters: Tuple[str, ...]
+    negative_prompts: Tuple[str, ...]
+    best_for: Tuple[str, ...]
+
+
+class ConceptConfig(NamedTuple):
+    """Attribute view of an AGENTIC_CONCEPTS entry."""
+    keywords: Tuple[str, ...]
+    metaphors: Tuple[str, ...]
+    visual_keywords: Tuple[str, ...]
+    default_style: str
+
+
+_STYLES: Dict[str, StyleConfig] = {
+    name: StyleConfig(
+        description=entry.get("description", ""),
+        keywords=entry.get("keywords", ()),
+        composition=entry.get("composition", ()),
+        quality_boosters=entry.get("quality_boosters", ()),
+        negative_prompts=entry.get("negative_prompts", ()),
+        best_for=entry.get("best_for", ()),
+    )
+    for name, entry in VISUAL_STYLES.items()
+}
+
+_CONCEPTS: Dict[str, ConceptConfig] = {
+    name: ConceptConfig(
+        keywords=entry.get("keywords", ()),
+        metaphors=entry.get("metaphors", ()),
+        visual_keywords=entry.get("visual_keywords", ()),
+        default_style=entry.get("default_style", "isometric"),
+    )
+    for name, entry in AGENTIC_CONCEPTS.items()
+}
+
+# Per-concept keyword tuples, flattened directly by the helpers below
+_CONCEPT_VISUAL_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    name: concept.visual_keywords for name, concept in _CONCEPTS.items()
+}
+_CONCEPT_METAPHORS: Dict[str, Tuple[str, ...]] = {
+    name: concept.metaphors for name, concept in _CONCEPTS.items()
+}
+
+# Small integer ids for styles, so style votes can be counted in a list
+_STYLE_NAMES: Tuple[str, ...] = tuple(VISUAL_STYLES)
+_STYLE_ID: Dict[str, int] = {name: i for i, name in enumerate(_STYLE_NAMES)}
+_CONCEPT_STYLE_ID: Dict[str, int] = {
+    name: _STYLE_ID.get(concept.default_style, _STYLE_ID["isometric"])
+    for name, concept in _CONCEPTS.items()
+}
+
+
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def get_style_config(style_name: str) -> Dict[str, Any]:
+# Fallbacks for unknown style/concept names
+_DEFAULT_STYLE = VISUAL_STYLES["isometric"]
+_DEFAULT_STYLE_VIEW = _STYLES["isometric"]
+_EMPTY_CONCEPT: Mapping[str, Any] = MappingProxyType({})
+
+
+def get_style_config(style_name: str) -> Mapping[str, Any]:
     """Get configuration for a specific visual style."""
-    return VISUAL_STYLES.get(style_name, VISUAL_STYLES["isometric"])
+    return VISUAL_STYLES.get(style_name, _DEFAULT_STYLE)
 
 
-def get_concept_config(concept_name: str) -> Dict[str, Any]:
+def get_concept_config(concept_name: str) -> Mapping[str, Any]:
     """Get configuration for a specific Agentic AI concept."""
-    return AGENTIC_CONCEPTS.get(concept_name, {})
+    return AGENTIC_CONCEPTS.get(concept_name, _EMPTY_CONCEPT)
+
+
+def get_style(style_name: str) -> StyleConfig:
+    """Like get_style_config(), but returns the attribute view."""
+    return _STYLES.get(style_name, _DEFAULT_STYLE_VIEW)
+
 
+def get_concept(concept_name: str) -> Optional[ConceptConfig]:
+    """Like get_concept_config(), but returns the attribute view (None if unknown)."""
+    return _CONCEPTS.get(concept_name)
 
-def get_quality_boosters(count: int = None) -> List[str]:
+
+def get_quality_boosters(count: int = None) -> Sequence[str]:
     """Get quality booster keywords."""
     if count:
         return QUALITY_BOOSTERS[:count]
     return QUALITY_BOOSTERS
 
 
-def get_negative_prompts(additional: List[str] = None) -> List[str]:
+def get_negative_prompts(additional: Sequence[str] = None) -> Sequence[str]:
     """Get negative prompt keywords, optionally with additional ones."""
-    prompts = NEGATIVE_PROMPTS.copy()
-    if additional:
-        prompts.extend(additional)
-    return prompts
+    if not additional:
+        return NEGATIVE_PROMPTS
+    return (*NEGATIVE_PROMPTS, *additional)
 
 
 def get_platform_format(platform: str, **kwargs) -> str:
     """Get platform-specific format string."""
-    config = PLATFORM_CONFIGS.get(platform, PLATFORM_CONFIGS["nano-banana-pro"])
+    return _platform_format(platform, kwargs.get("aspect_ratio"))
+
+
+def _parameter_flags(aspect_ratio: str, style_param: str, stylize_value: Any) -> str:
+    """Midjourney-style parameter flags ("--ar 16:9 --style raw --stylize 750")."""
+    return " ".join(("--ar", aspect_ratio, "--style", style_param, "--stylize", str(stylize_value)))
+
+
+# Hand-written renderers for the PLATFORM_CONFIGS format strings; platforms
+# without one use their format_string (empty means natural language only)
+_PLATFORM_BUILDERS: Dict[str, Callable[[str, str, Any], str]] = {
+    "nano-banana-pro": _parameter_flags,
+    "midjourney": _parameter_flags,
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _platform_format(platform: str, aspect_ratio: str = None) -> str:
+    """Render the format string for a platform (PLATFORM_CONFIGS is read-only)."""
+    if platform not in PLATFORM_CONFIGS:
+        platform = "nano-banana-pro"
+    config = PLATFORM_CONFIGS[platform]
     
-    # Merge default values with provided kwargs
+    # Merge default values with the requested aspect ratio
     params = {
-        "aspect_ratio": kwargs.get("aspect_ratio", config.get("aspect_ratio", "16:9")),
+        "aspect_ratio": aspect_ratio if aspect_ratio is not None else config.get("aspect_ratio", "16:9"),
         "style_param": config.get("style_param", "raw"),
         "stylize_value": config.get("stylize_value", 750)
     }
     
+    builder = _PLATFORM_BUILDERS.get(platform)
+    if builder is not None:
+        return builder(**params)
+    
     format_string = config.get("format_string", "")
     if format_string:
         return format_string.format(**params)
     return ""
 
 
+# Lowercased keywords per concept, and the concepts listing each keyword
+_CONCEPT_KEYWORDS_LOWER: Dict[str, Tuple[str, ...]] = {
+    concept_name: tuple(keyword.lower() for keyword in concept_config.get("keywords", []))
+    for concept_name, concept_config in AGENTIC_CONCEPTS.items()
+}
+
+
+def _index_keywords() -> Dict[str, Tuple[str, ...]]:
+    """Map each lowercase keyword to the concepts that list it."""
+    index: Dict[str, Tuple[str, ...]] = {}
+    for concept_name, keywords in _CONCEPT_KEYWORDS_LOWER.items():
+        for keyword in keywords:
+            index[keyword] = index.get(keyword, ()) + (concept_name,)
+    return index
+
+
+_KEYWORD_CONCEPTS = _index_keywords()
+
+_ALL_KEYWORDS: FrozenSet[str] = frozenset(_KEYWORD_CONCEPTS)
+
+
+# One bit per concept, in AGENTIC_CONCEPTS order
+_CONCEPT_BITS: Dict[str, int] = {
+    concept_name: 1 << i for i, concept_name in enumerate(AGENTIC_CONCEPTS)
+}
+
+# Lowercase keyword -> bitmask of the concepts that list it
+KEYWORD_CONCEPT_MASKS: Mapping[str, int] = MappingProxyType({
+    keyword: sum(_CONCEPT_BITS[concept_name] for concept_name in concept_names)
+    for keyword, concept_names in _KEYWORD_CONCEPTS.items()
+})
+
+
+def concepts_from_mask(mask: int) -> List[str]:
+    """Decode a KEYWORD_CONCEPT_MASKS bitmask into concept names."""
+    return [name for name, bit in _CONCEPT_BITS.items() if mask & bit]
+
+
+def _build_keyword_automaton():
+    """
+    Build an Aho-Corasick automaton mapping each lowercase keyword to a
+    bitmask of the concepts that list it, or None if pyahocorasick is not
+    installed.
+    """
+    if ahocorasick is None:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for keyword, mask in KEYWORD_CONCEPT_MASKS.items():
+        automaton.add_word(keyword, mask)
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+def _build_keyword_database():
+    """
+    Compile the keywords into a Hyperscan block-mode database, or return
+    None if hyperscan is not installed. Pattern ids index _DATABASE_MASKS.
+
+    Keywords are escaped, so they match literally rather than as regexes.
+    """
+    if hyperscan is None:
+        return None
+
+    keywords = list(KEYWORD_CONCEPT_MASKS)
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[re.escape(keyword).encode() for keyword in keywords],
+        ids=list(range(len(keywords))),
+        # One callback per keyword is enough to set its concept bits
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(keywords),
+    )
+    return database
+
+
+_DATABASE_MASKS: Tuple[int, ...] = tuple(KEYWORD_CONCEPT_MASKS.values())
+_KEYWORD_DATABASE = _build_keyword_database()
+
+# Hyperscan scratch space can only be used by one scan at a time, so each
+# thread allocates its own on first use
+_SCAN_STATE = threading.local()
+
+
+def _get_scratch():
+    """Return this thread's Hyperscan scratch space for _KEYWORD_DATABASE."""
+    scratch = getattr(_SCAN_STATE, "scratch", None)
+    if scratch is None:
+        scratch = _SCAN_STATE.scratch = hyperscan.Scratch(_KEYWORD_DATABASE)
+    return scratch
+
+
 def detect_concepts_in_text(text: str) -> List[str]:
     """
     Detect Agentic AI concepts in text.
     
+    With hyperscan or pyahocorasick installed all keywords are matched in a
+    single pass over the text (Hyperscan is preferred; it pulls ahead on very
+    long texts). Otherwise each concept's keywords are searched in turn.
+    Safe to call from several threads at once.
+    
     Args:
         text: The text to analyze (narration)
         
     Returns:
-        List of detected concept names
+        List of detected concept names, in AGENTIC_CONCEPTS order
     """
+    # One lowercase copy is a few percent of the call (ASCII lower() is a
+    # tight C loop); case-insensitive regexes on the raw text cost far more,
+    # and so does str.translate with an ASCII table (2-25x slower than lower()).
     text_lower = text.lower()
-    detected = []
-    
-    for concept_name, concept_config in AGENTIC_CONCEPTS.items():
-        keywords = concept_config.get("keywords", [])
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                detected.append(concept_name)
-                break  # Only add once per concept
+
+    if _KEYWORD_DATABASE is not None:
+        found = 0
+
+        def on_match(keyword_id, start, end, flags, context):
+            nonlocal found
+            found |= _DATABASE_MASKS[keyword_id]
+
+        # The lowered text is scanned (rather than HS_FLAG_CASELESS on the
+        # raw text) so matching agrees exactly with str.lower()
+        _KEYWORD_DATABASE.scan(
+            text_lower.encode(), match_event_handler=on_match, scratch=_get_scratch()
+        )
+        return concepts_from_mask(found)
+
+    if _KEYWORD_AUTOMATON is not None:
+        found = 0
+        for _, mask in _KEYWORD_AUTOMATON.iter(text_lower):
+            found |= mask
+        return concepts_from_mask(found)
+
+    # Plain substring tests beat one compiled regex alternation per concept
+    # here: keywords are short literals, so each `in` is a fast C search,
+    # while re (especially with IGNORECASE) is several times slower.
+    return [
+        concept_name
+        for concept_name, keywords in _CONCEPT_KEYWORDS_LOWER.items()
+        if any(keyword in text_lower for keyword in keywords)
+    ]
+
+
+def any_concept_in(text: str) -> bool:
+    """
+    Check whether text mentions any Agentic AI concept keyword.
     
-    return detected
+    Cheaper than detect_concepts_in_text() when only presence matters, as it
+    stops at the first keyword found.
+    """
+    text_lower = text.lower()
+    if _KEYWORD_AUTOMATON is not None:
+        return next(_KEYWORD_AUTOMATON.iter(text_lower), None) is not None
+    return any(keyword in text_lower for keyword in _ALL_KEYWORDS)
 
 
 def select_style_for_concepts(concepts: List[str]) -> str:
@@ -352,21 +660,24 @@ def select_style_for_concepts(concepts: List[str]) -> str:
     Returns:
         Style name
     """
-    if not concepts:
+    # Get default style ids for each concept
+    style_ids = [
+        _CONCEPT_STYLE_ID[concept]
+        for concept in concepts
+        if concept in _CONCEPT_STYLE_ID
+    ]
+    if not style_ids:
         return DEFAULT_CONFIG["default_style"]
     
-    # Get default styles for each concept
-    styles = []
-    for concept in concepts:
-        concept_config = get_concept_config(concept)
-        if concept_config:
-            styles.append(concept_config.get("default_style", "isometric"))
-    
-    # Return most common style, or first if tie
-    if styles:
-        return max(set(styles), key=styles.count)
+    votes = [0] * len(_STYLE_NAMES)
+    for style_id in style_ids:
+        votes[style_id] += 1
     
-    return DEFAULT_CONFIG["default_style"]
+    # Return most common style, or first seen if tie
+    top = max(votes)
+    for style_id in style_ids:
+        if votes[style_id] == top:
+            return _STYLE_NAMES[style_id]
 
 
 def get_visual_keywords_for_concepts(concepts: List[str]) -> List[str]:
@@ -374,17 +685,15 @@ def get_visual_keywords_for_concepts(concepts: List[str]) -> List[str]:
     Get visual keywords for a list of concepts.
     
     Args:
-        concepts: List of concept names
+        concepts: List of concept names (duplicates are expanded once)
         
     Returns:
         List of visual keywords
     """
-    keywords = []
-    for concept in concepts:
-        concept_config = get_concept_config(concept)
-        if concept_config:
-            keywords.extend(concept_config.get("visual_keywords", []))
-    return keywords
+    # Expand each concept once (in first-seen order); unknown concepts map
+    # to () so the whole flatten stays in C
+    unique = dict.fromkeys(concepts)
+    return list(chain.from_iterable(map(_CONCEPT_VISUAL_KEYWORDS.get, unique, repeat(()))))
 
 
 def get_metaphors_for_concepts(concepts: List[str]) -> List[str]:
@@ -392,14 +701,12 @@ def get_metaphors_for_concepts(concepts: List[str]) -> List[str]:
     Get visual metaphors for a list of concepts.
     
     Args:
-        concepts: List of concept names
+        concepts: List of concept names (duplicates are expanded once)
         
     Returns:
         List of metaphor descriptions
     """
-    metaphors = []
-    for concept in concepts:
-        concept_config = get_concept_config(concept)
-        if concept_config:
-            metaphors.extend(concept_config.get("metaphors", []))
-    return metaphors
+    # Expand each concept once (in first-seen order); unknown concepts map
+    # to () so the whole flatten stays in C
+    unique = dict.fromkeys(concepts)
+    return list(chain.from_iterable(map(_CONCEPT_METAPHORS.get, unique, repeat(()))))
@@ -7,12 +7,25 @@ five-layer architecture.
 """
 
 import argparse
+import functools
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+try:
+    import ahocorasick  # Optional: pyahocorasick speeds up narration scanning
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan  # Optional: used by detect_concepts_in_text when installed
+except ImportError:
+    hyperscan = None
 
 from prompt_config import (
-    get_style_config,
+    get_style,
     get_concept_config,
     get_quality_boosters,
     get_negative_prompts,
@@ -21,22 +34,161 @@ from prompt_config import (
     select_style_for_concepts,
     get_visual_keywords_for_concepts,
     get_metaphors_for_concepts,
+    concepts_from_mask,
+    KEYWORD_CONCEPT_MASKS,
     PROMPT_TEMPLATES,
-    DEFAULT_CONFIG
+    VISUAL_STYLES,
+    PromptConfig
+)
+from utils import load_segments, save_segments, narration_fingerprint
+
+
+# Action verbs looked for in narration, in order of preference
+ACTION_VERBS = (
+    "analyzing", "processing", "managing", "coordinating",
+    "monitoring", "protecting", "generating", "optimizing",
+    "integrating", "orchestrating"
 )
 
 
+def _build_narration_automaton():
+    """
+    Build an Aho-Corasick automaton over concept keywords and action verbs,
+    or None if pyahocorasick is not installed or hyperscan is.
+
+    Each word maps to (concept bitmask, index in ACTION_VERBS), with 0 and
+    len(ACTION_VERBS) standing for "no concept" and "not a verb". Some verbs
+    are concept keywords too (e.g. "monitoring").
+    
+    Walking every match in Python only beats separate passes when concept
+    detection would also use an automaton; Hyperscan detection plus the verb
+    loop is 2-4x faster on narrations over a few hundred characters.
+    """
+    if ahocorasick is None or hyperscan is not None:
+        return None
+
+    entries = {
+        keyword: (mask, len(ACTION_VERBS))
+        for keyword, mask in KEYWORD_CONCEPT_MASKS.items()
+    }
+    for index, verb in enumerate(ACTION_VERBS):
+        mask, _ = entries.get(verb, (0, None))
+        entries[verb] = (mask, index)
+
+    automaton = ahocorasick.Automaton()
+    for word, value in entries.items():
+        automaton.add_word(word, value)
+    automaton.make_automaton()
+    return automaton
+
+
+_NARRATION_AUTOMATON = _build_narration_automaton()
+
+
+def find_action_verb(narration: str) -> Optional[str]:
+    """
+    Find the preferred action verb mentioned in narration.
+    
+    Args:
+        narration: The narration text
+        
+    Returns:
+        The earliest ACTION_VERBS entry present in the text, or None
+    """
+    # Ten substring searches in C beat both the narration automaton (which
+    # also reports every concept keyword) and a verb regex, even on long text
+    narration_lower = narration.lower()
+    for verb in ACTION_VERBS:
+        if verb in narration_lower:
+            return verb
+    return None
+
+
+def scan_narration(narration: str) -> Tuple[List[str], Optional[str], int]:
+    """
+    Collect everything prompt generation needs from a narration.
+    
+    With pyahocorasick (and not hyperscan) installed, concepts and the action
+    verb come from a single pass over the lowered text. The automaton walk
+    already runs in C (~20us for a 1 KB narration), so a JIT-compiled scanner
+    would not pay back its import and compile time on a CLI run.
+    
+    Args:
+        narration: The narration text
+        
+    Returns:
+        Tuple of (detected concepts, action verb or None, end index of the
+        first sentence)
+    """
+    # Found on the original text: lower() can change the length of some
+    # non-ASCII strings, so offsets in the lowered copy may not line up
+    sentence_end = narration.find('.')
+    if sentence_end < 0:
+        sentence_end = len(narration)
+    
+    if _NARRATION_AUTOMATON is None:
+        return detect_concepts_in_text(narration), find_action_verb(narration), sentence_end
+    
+    found = 0
+    best = len(ACTION_VERBS)
+    for _, (mask, index) in _NARRATION_AUTOMATON.iter(narration.lower()):
+        found |= mask
+        if index < best:
+            best = index
+    verb = ACTION_VERBS[best] if best < len(ACTION_VERBS) else None
+    return concepts_from_mask(found), verb, sentence_end
+
+
+@functools.lru_cache(maxsize=32)
+def _style_layers(style: str) -> Tuple[str, str]:
+    """Joined style keywords (top 3) and default composition (top 2) for a style."""
+    style_config = get_style(style)
+    return ", ".join(style_config.keywords[:3]), ", ".join(style_config.composition[:2])
+
+
+@functools.lru_cache(maxsize=32)
+def _negative_prompt(style: Optional[str] = None) -> str:
+    """Joined negative prompts, plus the style's own when a style is given."""
+    additional = get_style(style).negative_prompts if style else None
+    return ", ".join(get_negative_prompts(additional=additional))
+
+
+# Layer 5 text, identical for every prompt
+QUALITY_LAYER = ", ".join(get_quality_boosters(count=4))
+
+
 class PromptGenerator:
     """Generate optimized image prompts from narration text."""
     
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Union[PromptConfig, Dict[str, Any]] = None):
         """
         Initialize the prompt generator.
         
         Args:
-            config: Configuration dictionary (uses DEFAULT_CONFIG if None)
+            config: PromptConfig or settings dict (defaults if None; missing
+                keys take their defaults). Style and platform fragments are
+                rendered from it here.
         """
-        self.config = config or DEFAULT_CONFIG.copy()
+        if config is None:
+            config = PromptConfig()
+        elif not isinstance(config, PromptConfig):
+            config = PromptConfig.from_dict(config)
+        self.config = config
+        
+        # generate_from_narration() results by (narration, style, use_template)
+        self._generated: Dict[Tuple[str, Optional[str], bool], Dict[str, Any]] = {}
+        
+        # Everything after the subject/action that only depends on the style
+        # and config, rendered up front
+        self._style_tails = {style: self._style_tail(style) for style in VISUAL_STYLES}
+        platform_format = get_platform_format(
+            self.config.platform,
+            aspect_ratio=self.config.aspect_ratio
+        )
+        self._platform_suffix = f" {platform_format}" if platform_format else ""
+        # Templates use the platform's own aspect ratio
+        template_format = get_platform_format(self.config.platform)
+        self._template_suffix = f" {template_format}" if template_format else ""
     
     def analyze_narration(self, narration: str) -> Dict[str, Any]:
         """
@@ -48,8 +200,10 @@ class PromptGenerator:
         Returns:
             Dictionary with analysis results
         """
-        concepts = detect_concepts_in_text(narration)
-        
+        return self._build_analysis(narration, detect_concepts_in_text(narration))
+    
+    def _build_analysis(self, narration: str, concepts: List[str]) -> Dict[str, Any]:
+        """Build the analysis dictionary for already detected concepts."""
         return {
             "narration": narration,
             "concepts": concepts,
@@ -80,8 +234,7 @@ class PromptGenerator:
         Returns:
             Complete prompt string
         """
-        style = style or self.config["default_style"]
-        style_config = get_style_config(style)
+        style = style or self.config.default_style
         
         # Build prompt layers
         layers = []
@@ -93,38 +246,39 @@ class PromptGenerator:
         if action:
             layers.append(action)
         
-        # Layer 3: Style keywords
-        style_keywords = style_config.get("keywords", [])
-        if style_keywords:
-            layers.append(", ".join(style_keywords[:3]))  # Use top 3
-        
-        # Layer 4: Composition
+        # Layers 3-5: Style keywords, composition, quality boosters
         if composition:
-            layers.append(composition)
-        elif style_config.get("composition"):
-            layers.append(", ".join(style_config["composition"][:2]))
-        
-        # Layer 5: Quality boosters
-        if self.config.get("include_quality_boosters", True):
-            quality = get_quality_boosters(count=4)
-            layers.append(", ".join(quality))
+            tail = self._style_tail(style, composition)
+        else:
+            tail = self._style_tails.get(style)
+            if tail is None:
+                tail = self._style_tail(style)
+        if tail:
+            layers.append(tail)
         
         # Additional keywords
         if additional_keywords:
             layers.append(", ".join(additional_keywords))
         
-        # Combine all layers
-        prompt = ". ".join(layers)
-        
-        # Add platform-specific formatting
-        platform_format = get_platform_format(
-            self.config.get("platform", "nano-banana-pro"),
-            aspect_ratio=self.config.get("aspect_ratio", "16:9")
-        )
-        if platform_format:
-            prompt += f" {platform_format}"
+        # Combine all layers and add platform-specific formatting
+        return ". ".join(layers) + self._platform_suffix
+    
+    def _style_tail(self, style: str, composition: str = "") -> str:
+        """
+        Render layers 3-5 for a style.
         
-        return prompt
+        Args:
+            style: Visual style name
+            composition: Composition override (uses the style's default if empty)
+            
+        Returns:
+            Style keywords, composition and quality boosters joined as layers
+        """
+        style_keywords, style_composition = _style_layers(style)
+        layers = [style_keywords, composition or style_composition]
+        if self.config.include_quality_boosters:
+            layers.append(QUALITY_LAYER)
+        return ". ".join(layer for layer in layers if layer)
     
     def generate_from_narration(
         self,
@@ -135,6 +289,9 @@ class PromptGenerator:
         """
         Generate a complete prompt from narration text.
         
+        Results are memoized per generator, so repeated narrations (intros,
+        transitions) are only generated once.
+        
         Args:
             narration: The narration text
             style: Override style (uses auto-detection if None)
@@ -143,8 +300,30 @@ class PromptGenerator:
         Returns:
             Dictionary with prompt and metadata
         """
-        # Analyze narration
-        analysis = self.analyze_narration(narration)
+        key = (narration, style, use_template)
+        result = self._generated.get(key)
+        if result is None:
+            result = self._generate(narration, style, use_template)
+            self._generated[key] = result
+        
+        # Callers may edit the result (e.g. interactive mode), so hand out copies
+        analysis = result["analysis"]
+        return {
+            **result,
+            "concepts": list(result["concepts"]),
+            "analysis": {
+                **analysis,
+                "concepts": list(analysis["concepts"]),
+                "visual_keywords": list(analysis["visual_keywords"]),
+                "metaphors": list(analysis["metaphors"])
+            }
+        }
+    
+    def _generate(self, narration: str, style: Optional[str], use_template: bool) -> Dict[str, Any]:
+        """Generate a prompt without consulting the memo (see generate_from_narration)."""
+        # Analyze narration (concepts, action verb and first sentence in one scan)
+        concepts, verb, sentence_end = scan_narration(narration)
+        analysis = self._build_analysis(narration, concepts)
         
         # Determine style
         final_style = style or analysis["suggested_style"]
@@ -154,24 +333,18 @@ class PromptGenerator:
             template_key = f"skill_{analysis['primary_concept']}"
             if template_key in PROMPT_TEMPLATES:
                 base_prompt = PROMPT_TEMPLATES[template_key]
-                style_config = get_style_config(final_style)
-                
                 # Add style keywords to template
-                style_keywords = ", ".join(style_config.get("keywords", [])[:3])
-                quality = ", ".join(get_quality_boosters(count=4))
-                
-                prompt = f"{base_prompt} {style_keywords}, {quality}"
+                style_keywords, _ = _style_layers(final_style)
+                prompt = f"{base_prompt} {style_keywords}"
+                if self.config.include_quality_boosters:
+                    prompt += f", {QUALITY_LAYER}"
                 
                 # Add platform format
-                platform_format = get_platform_format(
-                    self.config.get("platform", "nano-banana-pro")
-                )
-                if platform_format:
-                    prompt += f" {platform_format}"
+                prompt += self._template_suffix
                 
                 return {
                     "prompt": prompt,
-                    "negative_prompt": ", ".join(get_negative_prompts()),
+                    "negative_prompt": _negative_prompt(),
                     "style": final_style,
                     "concepts": analysis["concepts"],
                     "source": "template",
@@ -189,10 +362,10 @@ class PromptGenerator:
             subject = visual_keywords[0]
         else:
             # Fallback: extract key phrases from narration
-            subject = self._extract_subject_from_narration(narration)
+            subject = self._extract_subject_from_narration(narration, sentence_end)
         
         # Create action/context from narration
-        action = self._extract_action_from_narration(narration)
+        action = self._action_for_verb(verb)
         
         # Construct prompt
         prompt = self.construct_prompt(
@@ -202,56 +375,78 @@ class PromptGenerator:
             additional_keywords=visual_keywords[1:3] if len(visual_keywords) > 1 else None
         )
         
-        # Get negative prompts
-        style_config = get_style_config(final_style)
-        negative = get_negative_prompts(
-            additional=style_config.get("negative_prompts", [])
-        )
-        
         return {
             "prompt": prompt,
-            "negative_prompt": ", ".join(negative),
+            "negative_prompt": _negative_prompt(final_style),
             "style": final_style,
             "concepts": analysis["concepts"],
             "source": "generated",
             "analysis": analysis
         }
     
-    def _extract_subject_from_narration(self, narration: str) -> str:
+    def _extract_subject_from_narration(self, narration: str, sentence_end: int = None) -> str:
         """Extract a subject description from narration text."""
-        # Simple extraction: take first sentence or clause
-        sentences = narration.split('.')
-        if sentences:
-            first = sentences[0].strip()
-            # Limit length
-            if len(first) > 100:
-                first = first[:100] + "..."
-            return first
-        return "An abstract visualization of the concept"
+        # Simple extraction: take first sentence or clause. scan_narration
+        # already reports where it ends; otherwise look it up without
+        # splitting the whole narration into sentences.
+        if sentence_end is None:
+            sentence_end = narration.find('.')
+            if sentence_end < 0:
+                sentence_end = len(narration)
+        first = narration[:sentence_end].strip()
+        
+        # Limit length
+        if len(first) > 100:
+            first = first[:100] + "..."
+        return first
     
     def _extract_action_from_narration(self, narration: str) -> str:
         """Extract action/context from narration text."""
-        # Look for action verbs
-        action_verbs = [
-            "analyzing", "processing", "managing", "coordinating",
-            "monitoring", "protecting", "generating", "optimizing",
-            "integrating", "orchestrating"
-        ]
-        
-        narration_lower = narration.lower()
-        for verb in action_verbs:
-            if verb in narration_lower:
-                return f"{verb} data and information"
+        return self._action_for_verb(find_action_verb(narration))
+    
+    @staticmethod
+    def _action_for_verb(verb: Optional[str]) -> str:
+        """Describe the action/context for a detected verb."""
+        if verb:
+            return f"{verb} data and information"
         
         return "in a futuristic environment"
     
+    def _pregenerate(self, jobs: List[Tuple[str, Optional[str]]], workers: int) -> None:
+        """
+        Generate prompts in worker processes and store them in the memo.
+        
+        Args:
+            jobs: (narration, style) pairs to generate
+            workers: Number of worker processes
+        """
+        pending = [
+            (narration, style) for narration, style in dict.fromkeys(jobs)
+            if (narration, style, False) not in self._generated
+        ]
+        if not pending:
+            return
+        
+        print(f"Generating {len(pending)} prompts with {workers} workers...")
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.config,)
+        ) as executor:
+            results = executor.map(_generate_worker, pending, chunksize=chunksize)
+            for (narration, style), result in zip(pending, results):
+                self._generated[(narration, style, False)] = result
+    
     def enhance_segments_file(
         self,
         input_file: str,
         output_file: str = None,
         style: str = None,
         overwrite: bool = False,
-        interactive: bool = False
+        interactive: bool = False,
+        jobs: int = 1,
+        quiet: bool = False
     ) -> None:
         """
         Process a segments.json file and add generated prompts.
@@ -262,85 +457,113 @@ class PromptGenerator:
             style: Override style for all segments
             overwrite: Overwrite existing prompts
             interactive: Prompt user for review/editing
+            jobs: Worker processes for generating prompts (ignored in
+                interactive mode). Generation takes microseconds per segment,
+                so this only pays off for very large files.
+            quiet: Only print the summary, not a line per segment
         """
         output_file = output_file or input_file
         
+        # Per-segment progress lines
+        progress = print if not quiet else (lambda *args: None)
+        
         # Load segments
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_segments(input_file)
         
         # Add visual config if not present
         if "visual_config" not in data:
             data["visual_config"] = {
-                "primary_style": style or self.config["default_style"],
-                "consistency_mode": self.config.get("consistency_mode", "moderate"),
-                "platform": self.config.get("platform", "nano-banana-pro")
+                "primary_style": style or self.config.default_style,
+                "consistency_mode": self.config.consistency_mode,
+                "platform": self.config.platform
             }
         
+        segment_style = style or data["visual_config"].get("primary_style")
+        
         total_segments = 0
         generated_count = 0
         skipped_count = 0
         
-        # Process each segment
+        # Collect the segments that need a prompt in one pass, so generation
+        # runs over a flat list (and can be handed to worker processes)
+        targets: List[Tuple[Dict[str, Any], str, str]] = []
         for chapter in data.get("chapters", []):
             for segment in chapter.get("segments", []):
                 total_segments += 1
                 segment_id = segment.get("segment_id", "unknown")
                 
-                # Check if prompt already exists
+                # Check if prompt already exists (generated prompts are
+                # refreshed when the narration has changed since)
                 if segment.get("image_prompt") and not overwrite:
-                    if segment["image_prompt"] != "AUTO":
-                        print(f"[{segment_id}] Skipping (prompt exists)")
+                    if segment["image_prompt"] != "AUTO" and not _narration_changed(segment):
+                        progress(f"[{segment_id}] Skipping (prompt exists)")
                         skipped_count += 1
                         continue
                 
                 # Get narration
                 narration = segment.get("narration", "")
                 if not narration:
-                    print(f"[{segment_id}] Skipping (no narration)")
+                    progress(f"[{segment_id}] Skipping (no narration)")
                     skipped_count += 1
                     continue
                 
-                # Generate prompt
-                print(f"[{segment_id}] Generating prompt...")
-                result = self.generate_from_narration(
-                    narration,
-                    style=style or data["visual_config"].get("primary_style")
-                )
-                
-                # Interactive mode
-                if interactive:
-                    print(f"\nNarration: {narration}")
-                    print(f"\nGenerated Prompt:\n{result['prompt']}")
-                    print(f"\nNegative Prompt:\n{result['negative_prompt']}")
-                    print(f"\nDetected Concepts: {', '.join(result['concepts'])}")
-                    print(f"Style: {result['style']}")
-                    
-                    choice = input("\n[A]ccept, [E]dit, [S]kip? ").strip().lower()
-                    
-                    if choice == 's':
-                        print("Skipped.")
-                        skipped_count += 1
-                        continue
-                    elif choice == 'e':
-                        edited_prompt = input("Enter edited prompt: ").strip()
-                        if edited_prompt:
-                            result['prompt'] = edited_prompt
-                            result['source'] = 'manual'
+                targets.append((segment, segment_id, narration))
+        
+        if jobs > 1 and not interactive:
+            self._pregenerate(
+                [(narration, segment_style) for _, _, narration in targets],
+                jobs
+            )
+        
+        # Generate each distinct narration once, since intros and transitions
+        # often repeat verbatim. Interactive mode reviews every segment, so it
+        # gets its own copy per segment below.
+        results: Dict[str, Dict[str, Any]] = {}
+        if not interactive:
+            for narration in dict.fromkeys(narration for _, _, narration in targets):
+                results[narration] = self.generate_from_narration(narration, style=segment_style)
+        
+        # Write the prompts back to their segments
+        for segment, segment_id, narration in targets:
+            # Generate prompt
+            progress(f"[{segment_id}] Generating prompt...")
+            result = results.get(narration)
+            if result is None:
+                result = self.generate_from_narration(narration, style=segment_style)
+            
+            # Interactive mode
+            if interactive:
+                print(f"\nNarration: {narration}")
+                print(f"\nGenerated Prompt:\n{result['prompt']}")
+                print(f"\nNegative Prompt:\n{result['negative_prompt']}")
+                print(f"\nDetected Concepts: {', '.join(result['concepts'])}")
+                print(f"Style: {result['style']}")
                 
-                # Save to segment
-                segment["image_prompt"] = result["prompt"]
-                segment["image_prompt_negative"] = result["negative_prompt"]
-                segment["image_prompt_source"] = result["source"]
-                segment["agentic_concepts"] = result["concepts"]
-                segment["visual_style"] = result["style"]
+                choice = input("\n[A]ccept, [E]dit, [S]kip? ").strip().lower()
                 
-                generated_count += 1
-                print(f"[{segment_id}] ✓ Prompt generated")
+                if choice == 's':
+                    print("Skipped.")
+                    skipped_count += 1
+                    continue
+                elif choice == 'e':
+                    edited_prompt = input("Enter edited prompt: ").strip()
+                    if edited_prompt:
+                        result['prompt'] = edited_prompt
+                        result['source'] = 'manual'
+            
+            # Save to segment
+            segment["image_prompt"] = result["prompt"]
+            segment["image_prompt_negative"] = result["negative_prompt"]
+            segment["image_prompt_source"] = result["source"]
+            segment["image_prompt_narration_fp"] = narration_fingerprint(narration)
+            segment["agentic_concepts"] = result["concepts"]
+            segment["visual_style"] = result["style"]
+            
+            generated_count += 1
+            progress(f"[{segment_id}] ✓ Prompt generated")
         
         # Save enhanced file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        save_segments(output_file, data)
         
         print(f"\n{'='*60}")
         print(f"Summary:")
@@ -351,6 +574,32 @@ class PromptGenerator:
         print(f"{'='*60}")
 
 
+def _narration_changed(segment: Dict[str, Any]) -> bool:
+    """Whether a segment's generated prompt was made from a different narration."""
+    fingerprint = segment.get("image_prompt_narration_fp")
+    return (
+        fingerprint is not None
+        and segment.get("image_prompt_source") in ("generated", "template")
+        and fingerprint != narration_fingerprint(segment.get("narration", ""))
+    )
+
+
+# The generator used by this worker process (set by _init_worker)
+_worker_generator: Optional[PromptGenerator] = None
+
+
+def _init_worker(config: PromptConfig) -> None:
+    """Create the worker's generator once, rather than once per prompt."""
+    global _worker_generator
+    _worker_generator = PromptGenerator(config)
+
+
+def _generate_worker(job: Tuple[str, Optional[str]]) -> Dict[str, Any]:
+    """Generate one prompt in a worker process (see PromptGenerator._pregenerate)."""
+    narration, style = job
+    return _worker_generator._generate(narration, style, False)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate optimized image prompts from narration text"
@@ -372,10 +621,22 @@ def main():
     batch.add_argument("--style", help="Override style for all segments")
     batch.add_argument("--overwrite", action="store_true", help="Overwrite existing prompts")
     batch.add_argument("--interactive", action="store_true", help="Review each prompt interactively")
+    batch.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for generating prompts, 0 for one per CPU (only worth it for very large files)"
+    )
+    batch.add_argument("--quiet", action="store_true", help="Only print the summary")
     
     # Configuration
     parser.add_argument("--platform", default="nano-banana-pro", help="Target platform")
     parser.add_argument("--aspect-ratio", default="16:9", help="Aspect ratio")
+    parser.add_argument(
+        "--no-quality-boosters",
+        action="store_true",
+        help="Leave the quality booster layer out of prompts"
+    )
     
     args = parser.parse_args()
     
@@ -384,9 +645,11 @@ def main():
         return
     
     # Create config
-    config = DEFAULT_CONFIG.copy()
-    config["platform"] = args.platform
-    config["aspect_ratio"] = args.aspect_ratio
+    config = PromptConfig(
+        platform=args.platform,
+        aspect_ratio=args.aspect_ratio,
+        include_quality_boosters=not args.no_quality_boosters
+    )
     
     # Create generator
     generator = PromptGenerator(config)
@@ -426,7 +689,9 @@ def main():
             output_file=args.output,
             style=args.style,
             overwrite=args.overwrite,
-            interactive=args.interactive
+            interactive=args.interactive,
+            jobs=args.jobs or os.cpu_count() or 1,
+            quiet=args.quiet
         )
 
 
@@ -7,12 +7,36 @@ image prompts. Includes tagging, usage tracking, and export/import capabilities.
 
 import argparse
 import json
+import re
 import sqlite3
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 
 from prompt_config import detect_concepts_in_text
+from utils import read_json
+
+
+def _fts_query(query: str) -> Optional[str]:
+    """
+    Turn a free-text query into an FTS5 MATCH expression.
+    
+    The words are matched as a phrase, with the last one as a prefix since
+    callers may pass truncated text (e.g. the first 50 characters of a
+    narration). Returns None if the query has no searchable words.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return '"' + " ".join(words) + '" *'
+
+
+# prompts columns in table order (the key order of an export)
+_EXPORT_COLUMNS = (
+    "id", "prompt_text", "negative_prompt", "narration_context", "concepts",
+    "style", "rating", "tags", "image_path", "created_at", "updated_at",
+    "used_count", "notes",
+)
 
 
 class PromptLibrary:
@@ -29,8 +53,21 @@ class PromptLibrary:
             db_path = str(Path.home() / ".prompt_library.db")
         
         self.db_path = db_path
+        # sqlite3 keeps prepared statements keyed by SQL text (128 by
+        # default), so the constant SQL strings below are only compiled once
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row  # Access columns by name
+        
+        # WAL lets searches run while another process writes, and with
+        # synchronous=NORMAL commits no longer wait for a disk sync
+        # (the database stays consistent; a power cut can lose the last commit)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.execute("PRAGMA cache_size = -65536")  # 64 MiB
+        self.conn.execute("PRAGMA mmap_size = 268435456")  # 256 MiB
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.has_fts = False  # Set by _init_database if SQLite has FTS5
         self._init_database()
     
     def _init_database(self):
@@ -68,10 +105,49 @@ class PromptLibrary:
             )
         """)
         
+        # Keep prompts.used_count in step with the history
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompt_history_ai
+            AFTER INSERT ON prompt_history BEGIN
+                UPDATE prompts SET used_count = used_count + 1 WHERE id = new.prompt_id;
+            END
+        """)
+        
+        # Concepts and tags, one row per value, for exact indexed filtering
+        # (prompts.concepts/tags keep the JSON lists for export)
+        labels_existed = self._table_exists(cursor, "prompt_concepts")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS prompt_concepts (
+                prompt_id INTEGER NOT NULL,
+                concept TEXT NOT NULL,
+                PRIMARY KEY (prompt_id, concept),
+                FOREIGN KEY (prompt_id) REFERENCES prompts(id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS prompt_tags (
+                prompt_id INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (prompt_id, tag),
+                FOREIGN KEY (prompt_id) REFERENCES prompts(id)
+            )
+        """)
+        
         # Create indexes
+        # search_prompts' sort order, so top-N results need no temp sort
+        # (also serves rating filters, replacing idx_prompts_rating)
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_prompts_rating 
-            ON prompts(rating)
+            CREATE INDEX IF NOT EXISTS idx_prompts_sort
+            ON prompts(rating DESC, used_count DESC, created_at DESC)
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_prompts_rating")
+        
+        # "Most used" statistics
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_prompts_used
+            ON prompts(used_count DESC)
         """)
         
         cursor.execute("""
@@ -79,13 +155,173 @@ class PromptLibrary:
             ON prompts(style)
         """)
         
+        # History is only ever looked up by prompt (deletes, and the foreign
+        # key check when a prompt is deleted)
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_prompts_concepts 
-            ON prompts(concepts)
+            CREATE INDEX IF NOT EXISTS idx_prompt_history_prompt
+            ON prompt_history(prompt_id)
         """)
         
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_prompt_concepts_concept
+            ON prompt_concepts(concept)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_prompt_tags_tag
+            ON prompt_tags(tag)
+        """)
+        
+        # Replaced by prompt_concepts; a JSON text index never helped LIKE '%x%'
+        cursor.execute("DROP INDEX IF EXISTS idx_prompts_concepts")
+        
+        # Fill the label tables from prompts saved before they existed
+        if not labels_existed:
+            cursor.execute("SELECT id, concepts, tags FROM prompts")
+            for prompt_id, concepts, tags in cursor.fetchall():
+                self._set_labels(cursor, prompt_id, concepts=json.loads(concepts or "[]"))
+                self._set_labels(cursor, prompt_id, tags=json.loads(tags or "[]"))
+        
+        self._init_stats(cursor)
+        self._init_fts(cursor)
+        
         self.conn.commit()
     
+    def _init_stats(self, cursor: sqlite3.Cursor):
+        """
+        Keep per-rating and per-style prompt counts in stats_counter, updated
+        by triggers, so get_statistics does not group the whole table.
+        """
+        existed = self._table_exists(cursor, "stats_counter")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_counter (
+                bucket TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (bucket, key)
+            ) WITHOUT ROWID
+        """)
+        
+        # NULL ratings/styles are not counted (by_style never listed them)
+        increment = """
+                INSERT INTO stats_counter (bucket, key, count)
+                SELECT 'rating', new.rating, 1 WHERE new.rating IS NOT NULL
+                ON CONFLICT (bucket, key) DO UPDATE SET count = count + 1;
+                INSERT INTO stats_counter (bucket, key, count)
+                SELECT 'style', new.style, 1 WHERE new.style IS NOT NULL
+                ON CONFLICT (bucket, key) DO UPDATE SET count = count + 1;
+        """
+        decrement = """
+                UPDATE stats_counter SET count = count - 1
+                WHERE bucket = 'rating' AND key = old.rating;
+                UPDATE stats_counter SET count = count - 1
+                WHERE bucket = 'style' AND key = old.style;
+        """
+        
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_counter_ai
+            AFTER INSERT ON prompts BEGIN {increment} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_counter_ad
+            AFTER DELETE ON prompts BEGIN {decrement} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_counter_au
+            AFTER UPDATE OF rating, style ON prompts BEGIN {decrement} {increment} END
+        """)
+        
+        # Count prompts saved before the counters existed
+        if not existed:
+            cursor.execute("""
+                INSERT INTO stats_counter (bucket, key, count)
+                SELECT 'rating', rating, COUNT(*) FROM prompts
+                WHERE rating IS NOT NULL GROUP BY rating
+            """)
+            cursor.execute("""
+                INSERT INTO stats_counter (bucket, key, count)
+                SELECT 'style', style, COUNT(*) FROM prompts
+                WHERE style IS NOT NULL GROUP BY style
+            """)
+    
+    def _init_fts(self, cursor: sqlite3.Cursor):
+        """
+        Index prompt text and narration in an FTS5 table kept in sync by
+        triggers, so text search does not scan every row. Skipped (text
+        search falls back to LIKE) if SQLite was built without FTS5.
+        """
+        existed = self._table_exists(cursor, "prompts_fts")
+        
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+                    prompt_text, narration_context,
+                    content='prompts', content_rowid='id',
+                    tokenize='unicode61'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_ai AFTER INSERT ON prompts BEGIN
+                INSERT INTO prompts_fts (rowid, prompt_text, narration_context)
+                VALUES (new.id, new.prompt_text, new.narration_context);
+            END
+        """)
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_ad AFTER DELETE ON prompts BEGIN
+                INSERT INTO prompts_fts (prompts_fts, rowid, prompt_text, narration_context)
+                VALUES ('delete', old.id, old.prompt_text, old.narration_context);
+            END
+        """)
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_au
+            AFTER UPDATE OF prompt_text, narration_context ON prompts BEGIN
+                INSERT INTO prompts_fts (prompts_fts, rowid, prompt_text, narration_context)
+                VALUES ('delete', old.id, old.prompt_text, old.narration_context);
+                INSERT INTO prompts_fts (rowid, prompt_text, narration_context)
+                VALUES (new.id, new.prompt_text, new.narration_context);
+            END
+        """)
+        
+        # Index prompts saved before the FTS table existed
+        if not existed:
+            cursor.execute("INSERT INTO prompts_fts (prompts_fts) VALUES ('rebuild')")
+        
+        self.has_fts = True
+    
+    @staticmethod
+    def _table_exists(cursor: sqlite3.Cursor, name: str) -> bool:
+        """Check whether a table exists in the database."""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        )
+        return cursor.fetchone() is not None
+    
+    @staticmethod
+    def _set_labels(
+        cursor: sqlite3.Cursor,
+        prompt_id: int,
+        concepts: List[str] = None,
+        tags: List[str] = None
+    ):
+        """Replace a prompt's rows in prompt_concepts and/or prompt_tags."""
+        for table, column, labels in (
+            ("prompt_concepts", "concept", concepts),
+            ("prompt_tags", "tag", tags),
+        ):
+            if labels is None:
+                continue
+            cursor.execute(f"DELETE FROM {table} WHERE prompt_id = ?", (prompt_id,))
+            cursor.executemany(
+                f"INSERT INTO {table} (prompt_id, {column}) VALUES (?, ?)",
+                [(prompt_id, label) for label in dict.fromkeys(labels)]
+            )
+    
     def save_prompt(
         self,
         prompt: str,
@@ -96,7 +332,8 @@ class PromptLibrary:
         rating: int = 0,
         tags: List[str] = None,
         image_path: str = None,
-        notes: str = None
+        notes: str = None,
+        commit: bool = True
     ) -> int:
         """
         Save a prompt to the library.
@@ -111,6 +348,8 @@ class PromptLibrary:
             tags: List of tags
             image_path: Path to generated image
             notes: Additional notes
+            commit: Commit right away (False leaves it to the caller, so
+                bulk inserts share one transaction)
             
         Returns:
             Prompt ID
@@ -136,9 +375,25 @@ class PromptLibrary:
             image_path,
             notes
         ))
+        prompt_id = cursor.lastrowid
+        self._set_labels(cursor, prompt_id, concepts=concepts or [], tags=tags or [])
         
-        self.conn.commit()
-        return cursor.lastrowid
+        if commit:
+            self.conn.commit()
+        return prompt_id
+    
+    def save_prompts(self, prompts: List[Dict[str, Any]]) -> List[int]:
+        """
+        Save several prompts in one transaction.
+        
+        Args:
+            prompts: save_prompt keyword arguments, one dictionary per prompt
+            
+        Returns:
+            Prompt IDs, in order
+        """
+        with self.conn:
+            return [self.save_prompt(**prompt, commit=False) for prompt in prompts]
     
     def update_prompt(
         self,
@@ -186,15 +441,19 @@ class PromptLibrary:
         updates.append("updated_at = CURRENT_TIMESTAMP")
         values.append(prompt_id)
         
-        cursor = self.conn.cursor()
-        cursor.execute(f"""
-            UPDATE prompts 
-            SET {', '.join(updates)}
-            WHERE id = ?
-        """, values)
-        
-        self.conn.commit()
-        return cursor.rowcount > 0
+        # The row and its tag rows change together, or not at all
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute(f"""
+                UPDATE prompts 
+                SET {', '.join(updates)}
+                WHERE id = ?
+            """, values)
+            updated = cursor.rowcount > 0
+            if updated and tags is not None:
+                self._set_labels(cursor, prompt_id, tags=tags)
+        
+        return updated
     
     def rate_prompt(self, prompt_id: int, rating: int) -> bool:
         """
@@ -225,11 +484,13 @@ class PromptLibrary:
         Search prompts in the library.
         
         Args:
-            query: Text search in prompt and narration
-            concepts: Filter by concepts
+            query: Text search in prompt and narration (whole words, the
+                last one as a prefix, when SQLite has FTS5; otherwise
+                substring)
+            concepts: Filter by concepts (prompts must have all of them)
             style: Filter by style
             min_rating: Minimum rating
-            tags: Filter by tags
+            tags: Filter by tags (prompts must have all of them)
             limit: Maximum results
             
         Returns:
@@ -239,13 +500,23 @@ class PromptLibrary:
         values = []
         
         if query:
-            conditions.append("(prompt_text LIKE ? OR narration_context LIKE ?)")
-            values.extend([f"%{query}%", f"%{query}%"])
+            match = _fts_query(query) if self.has_fts else None
+            if match:
+                conditions.append(
+                    "id IN (SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ?)"
+                )
+                values.append(match)
+            else:
+                conditions.append("(prompt_text LIKE ? OR narration_context LIKE ?)")
+                values.extend([f"%{query}%", f"%{query}%"])
         
         if concepts:
             for concept in concepts:
-                conditions.append("concepts LIKE ?")
-                values.append(f"%{concept}%")
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM prompt_concepts c "
+                    "WHERE c.prompt_id = prompts.id AND c.concept = ?)"
+                )
+                values.append(concept)
         
         if style:
             conditions.append("style = ?")
@@ -257,8 +528,11 @@ class PromptLibrary:
         
         if tags:
             for tag in tags:
-                conditions.append("tags LIKE ?")
-                values.append(f"%{tag}%")
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM prompt_tags t "
+                    "WHERE t.prompt_id = prompts.id AND t.tag = ?)"
+                )
+                values.append(tag)
         
         where_clause = " AND ".join(conditions) if conditions else "1=1"
         
@@ -304,23 +578,58 @@ class PromptLibrary:
         Returns:
             List of similar prompts
         """
+        return self.search_prompts(
+            **self._similar_search_args(narration),
+            min_rating=min_rating,
+            limit=limit
+        )
+    
+    def get_similar_prompts_batch(
+        self,
+        narrations: List[str],
+        limit: int = 5,
+        min_rating: int = 3
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Find similar prompts for several narrations at once.
+        
+        Narrations that lead to the same search (same detected concepts, or
+        the same text) share one query.
+        
+        Args:
+            narrations: Narration texts to match
+            limit: Maximum results per narration
+            min_rating: Minimum rating
+            
+        Returns:
+            Dictionary mapping each narration to its similar prompts
+        """
+        searches = {}
+        results = {}
+        for narration in dict.fromkeys(narrations):
+            args = self._similar_search_args(narration)
+            key = (args.get("query"), frozenset(args.get("concepts", ())))
+            if key not in searches:
+                searches[key] = self.search_prompts(
+                    **args,
+                    min_rating=min_rating,
+                    limit=limit
+                )
+            results[narration] = searches[key]
+        return results
+    
+    @staticmethod
+    def _similar_search_args(narration: str) -> Dict[str, Any]:
+        """search_prompts filters for prompts similar to a narration."""
         # Detect concepts in narration
         concepts = detect_concepts_in_text(narration)
         
         if not concepts:
             # Fallback to text search
-            return self.search_prompts(
-                query=narration[:50],  # First 50 chars
-                min_rating=min_rating,
-                limit=limit
-            )
+            return {"query": narration[:50]}  # First 50 chars
         
         # Search by concepts
-        return self.search_prompts(
-            concepts=concepts,
-            min_rating=min_rating,
-            limit=limit
-        )
+        return {"concepts": concepts}
     
     def record_usage(
         self,
@@ -337,26 +646,45 @@ class PromptLibrary:
             project_name: Project name
             
         Returns:
-            True if successful
+            True if successful (False if the prompt does not exist)
         """
         cursor = self.conn.cursor()
         
         # Add to history
-        cursor.execute("""
-            INSERT INTO prompt_history (prompt_id, segment_id, project_name)
-            VALUES (?, ?, ?)
-        """, (prompt_id, segment_id, project_name))
-        
-        # Increment usage count
-        cursor.execute("""
-            UPDATE prompts
-            SET used_count = used_count + 1
-            WHERE id = ?
-        """, (prompt_id,))
+        try:
+            cursor.execute("""
+                INSERT INTO prompt_history (prompt_id, segment_id, project_name)
+                VALUES (?, ?, ?)
+            """, (prompt_id, segment_id, project_name))
+        except sqlite3.IntegrityError:
+            # Unknown prompt_id (foreign keys are enforced). SQLite aborts just
+            # this statement, so other pending writes are kept.
+            return False
         
+        # used_count is incremented by the prompt_history_ai trigger
         self.conn.commit()
         return True
     
+    def record_usages(self, usages: List[Tuple[int, Optional[str], Optional[str]]]) -> int:
+        """
+        Record many prompt usages in one transaction.
+        
+        Args:
+            usages: (prompt_id, segment_id, project_name) tuples
+            
+        Returns:
+            Number of usages recorded
+            
+        Raises:
+            sqlite3.IntegrityError: If a prompt does not exist (nothing is recorded)
+        """
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO prompt_history (prompt_id, segment_id, project_name)
+                VALUES (?, ?, ?)
+            """, usages)
+        return len(usages)
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get library statistics.
@@ -370,21 +698,20 @@ class PromptLibrary:
         cursor.execute("SELECT COUNT(*) FROM prompts")
         total = cursor.fetchone()[0]
         
-        # By rating
+        # By rating (counters kept by the stats_counter triggers)
         cursor.execute("""
-            SELECT rating, COUNT(*) as count
-            FROM prompts
-            GROUP BY rating
+            SELECT CAST(key AS INTEGER) AS rating, count
+            FROM stats_counter
+            WHERE bucket = 'rating' AND count > 0
             ORDER BY rating DESC
         """)
         by_rating = {row[0]: row[1] for row in cursor.fetchall()}
         
         # By style
         cursor.execute("""
-            SELECT style, COUNT(*) as count
-            FROM prompts
-            WHERE style IS NOT NULL
-            GROUP BY style
+            SELECT key, count
+            FROM stats_counter
+            WHERE bucket = 'style' AND count > 0
             ORDER BY count DESC
         """)
         by_style = {row[0]: row[1] for row in cursor.fetchall()}
@@ -428,25 +755,33 @@ class PromptLibrary:
         Returns:
             True if successful
         """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM prompts ORDER BY created_at DESC")
-        
-        prompts = []
-        for row in cursor.fetchall():
-            prompt_dict = dict(row)
-            # Parse JSON fields
-            if prompt_dict.get('concepts'):
-                prompt_dict['concepts'] = json.loads(prompt_dict['concepts'])
-            if prompt_dict.get('tags'):
-                prompt_dict['tags'] = json.loads(prompt_dict['tags'])
-            prompts.append(prompt_dict)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                "exported_at": datetime.now().isoformat(),
-                "total_prompts": len(prompts),
-                "prompts": prompts
-            }, f, indent=2, ensure_ascii=False)
+        # SQLite encodes each row (concepts/tags are already JSON text, so
+        # json() embeds them as lists) instead of building a dict per row and
+        # decoding and re-encoding the label lists in Python
+        columns = ", ".join(
+            f"'{column}', json({column})" if column in ("concepts", "tags")
+            else f"'{column}', {column}"
+            for column in _EXPORT_COLUMNS
+        )
+        rows = self.conn.execute(f"""
+            SELECT json_object({columns})
+            FROM prompts
+            ORDER BY created_at DESC
+        """).fetchall()
+        
+        header = json.dumps({
+            "exported_at": datetime.now().isoformat(),
+            "total_prompts": len(rows)
+        })
+        
+        # One prompt per line; written to a temporary file first (as write_json does)
+        path = Path(output_file)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(header[:-1] + ', "prompts": [\n')
+            f.write(",\n".join(row[0] for row in rows))
+            f.write("\n]}\n")
+        tmp_path.replace(path)
         
         return True
     
@@ -461,33 +796,41 @@ class PromptLibrary:
         Returns:
             Number of prompts imported
         """
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if not merge:
-            # Clear existing data
-            cursor = self.conn.cursor()
-            cursor.execute("DELETE FROM prompt_history")
-            cursor.execute("DELETE FROM prompts")
-            self.conn.commit()
+        data = read_json(input_file)
         
+        # One transaction for the whole import (a commit per prompt means a
+        # disk sync per prompt); an interrupted replace is rolled back
         imported = 0
-        for prompt_data in data.get('prompts', []):
-            try:
-                self.save_prompt(
-                    prompt=prompt_data['prompt_text'],
-                    negative_prompt=prompt_data.get('negative_prompt'),
-                    narration=prompt_data.get('narration_context'),
-                    concepts=prompt_data.get('concepts'),
-                    style=prompt_data.get('style'),
-                    rating=prompt_data.get('rating', 0),
-                    tags=prompt_data.get('tags'),
-                    image_path=prompt_data.get('image_path'),
-                    notes=prompt_data.get('notes')
-                )
-                imported += 1
-            except Exception as e:
-                print(f"Error importing prompt: {e}")
+        with self.conn:
+            if not merge:
+                # Clear existing data
+                cursor = self.conn.cursor()
+                cursor.execute("DELETE FROM prompt_history")
+                cursor.execute("DELETE FROM prompt_concepts")
+                cursor.execute("DELETE FROM prompt_tags")
+                cursor.execute("DELETE FROM prompts")
+            
+            for prompt_data in data.get('prompts', []):
+                try:
+                    self.save_prompt(
+                        prompt=prompt_data['prompt_text'],
+                        negative_prompt=prompt_data.get('negative_prompt'),
+                        narration=prompt_data.get('narration_context'),
+                        concepts=prompt_data.get('concepts'),
+                        style=prompt_data.get('style'),
+                        rating=prompt_data.get('rating', 0),
+                        tags=prompt_data.get('tags'),
+                        image_path=prompt_data.get('image_path'),
+                        notes=prompt_data.get('notes'),
+                        commit=False
+                    )
+                    imported += 1
+                except Exception as e:
+                    print(f"Error importing prompt: {e}")
+        
+        # Refresh the planner's statistics after the bulk change
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
         
         return imported
     
@@ -503,8 +846,10 @@ class PromptLibrary:
         """
         cursor = self.conn.cursor()
         
-        # Delete history
+        # Delete history and labels
         cursor.execute("DELETE FROM prompt_history WHERE prompt_id = ?", (prompt_id,))
+        cursor.execute("DELETE FROM prompt_concepts WHERE prompt_id = ?", (prompt_id,))
+        cursor.execute("DELETE FROM prompt_tags WHERE prompt_id = ?", (prompt_id,))
         
         # Delete prompt
         cursor.execute("DELETE FROM prompts WHERE id = ?", (prompt_id,))
@@ -514,6 +859,9 @@ class PromptLibrary:
     
     def close(self):
         """Close the database connection."""
+        # Let SQLite re-analyze tables whose indexes lack statistics or have
+        # changed a lot, so search_prompts picks indexes by row counts
+        self.conn.execute("PRAGMA optimize")
         self.conn.close()
 
 
@@ -4,66 +4,227 @@ utils.py - Shared utilities for the longform video generator.
 Provides common functions for file operations, duration detection, and validation.
 """
 
+import functools
+import hashlib
 import json
+import os
 import subprocess
 import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-
-
+from typing import Optional, Tuple
+
+try:
+    from mutagen.mp3 import MP3
+except ImportError:  # Optional: durations fall back to ffprobe
+    MP3 = None
+
+try:
+    import orjson
+except ImportError:  # Optional: JSON files fall back to the json module
+    orjson = None
+
+
+# Hardware H.264 encoders in order of preference, with settings that roughly
+# match the quality of the libx264 -crf 23 default
+HARDWARE_ENCODERS = {
+    "h264_nvenc": ["-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+    "h264_qsv": ["-preset", "medium", "-global_quality", "23"],
+    "h264_videotoolbox": ["-q:v", "55"],
+}
+
+# All output is rendered from still images, so libx264 is tuned for them:
+# a long GOP without scene-cut detection, a short lookahead and no B-frames
+# skip motion-search work that static or slowly panning frames don't need
+LIBX264_ARGS = [
+    "-preset", "medium",
+    "-crf", "23",
+    "-tune", "stillimage",
+    "-x264-params", "keyint=300:min-keyint=30:scenecut=0:rc-lookahead=10:bframes=0",
+]
+
+# Per-directory record of the input hash each output was generated from
+MANIFEST_FILE = ".manifest.json"
+
+# Common install locations (Homebrew on macOS, then system paths), checked
+# when the tools are not on PATH
+_COMMON_FFMPEG_PATHS = (
+    "/opt/homebrew/bin/ffmpeg",
+    "/usr/local/bin/ffmpeg",
+    "/usr/bin/ffmpeg",
+)
+_COMMON_FFPROBE_PATHS = (
+    "/opt/homebrew/bin/ffprobe",
+    "/usr/local/bin/ffprobe",
+    "/usr/bin/ffprobe",
+)
+
+
+@functools.lru_cache(maxsize=1)
 def get_ffmpeg_path() -> Optional[str]:
-    """Find FFmpeg executable path."""
+    """Find FFmpeg executable path (cached for the lifetime of the process)."""
     # Check PATH first
     path = shutil.which("ffmpeg")
     if path:
         return path
 
     # Check common locations on macOS
-    common_paths = [
-        "/opt/homebrew/bin/ffmpeg",
-        "/usr/local/bin/ffmpeg",
-        "/usr/bin/ffmpeg",
-    ]
-    for p in common_paths:
-        if Path(p).exists():
-            return p
-
-    return None
+    return next((p for p in _COMMON_FFMPEG_PATHS if os.path.isfile(p)), None)
 
 
+@functools.lru_cache(maxsize=1)
 def get_ffprobe_path() -> Optional[str]:
-    """Find ffprobe executable path."""
+    """Find ffprobe executable path (cached for the lifetime of the process)."""
     # Check PATH first
     path = shutil.which("ffprobe")
     if path:
         return path
 
     # Check common locations on macOS
-    common_paths = [
-        "/opt/homebrew/bin/ffprobe",
-        "/usr/local/bin/ffprobe",
-        "/usr/bin/ffprobe",
-    ]
-    for p in common_paths:
-        if Path(p).exists():
-            return p
-
-    return None
+    return next((p for p in _COMMON_FFPROBE_PATHS if os.path.isfile(p)), None)
 
 
 def check_ffmpeg() -> bool:
-    """Check if FFmpeg is available on the system."""
+    """Check if FFmpeg is available on the system (uses the cached lookup)."""
     return get_ffmpeg_path() is not None
 
 
 def check_ffprobe() -> bool:
-    """Check if ffprobe is available on the system."""
+    """Check if ffprobe is available on the system (uses the cached lookup)."""
     return get_ffprobe_path() is not None
 
 
+def run_ffmpeg(cmd: list, tail_lines: int = 200) -> Tuple[int, str]:
+    """
+    Run an FFmpeg command, keeping only the end of its log output.
+
+    stderr is drained line by line while the process runs, so a verbose run
+    can neither fill the pipe nor accumulate its whole log in memory.
+
+    Args:
+        cmd: FFmpeg command as an argument list
+        tail_lines: Number of trailing stderr lines to keep
+
+    Returns:
+        Tuple of (return code, last stderr lines joined into one string)
+    """
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        bufsize=1,
+    ) as proc:
+        tail = deque(proc.stderr, maxlen=tail_lines)
+
+    return proc.returncode, "".join(tail)
+
+
+def _encoder_works(ffmpeg: str, encoder: str) -> bool:
+    """Encode a single test frame to check the encoder has a usable device."""
+    cmd = [
+        ffmpeg, "-hide_banner",
+        "-loglevel", "error",
+        "-f", "lavfi",
+        "-i", "color=c=black:s=256x256:d=0.1",
+        "-frames:v", "1",
+        "-c:v", encoder,
+        "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return result.returncode == 0
+
+
+@functools.lru_cache(maxsize=1)
+def get_video_encoder() -> str:
+    """
+    Pick the H.264 encoder to use for video output.
+
+    The VIDEO_ENCODER environment variable overrides detection (use "libx264"
+    to force software encoding). Otherwise the first hardware encoder that
+    FFmpeg lists and that can encode a test frame is used, falling back to
+    libx264. The result is cached for the lifetime of the process.
+
+    Returns:
+        FFmpeg encoder name
+    """
+    requested = os.getenv("VIDEO_ENCODER", "auto")
+    if requested != "auto":
+        return requested
+
+    ffmpeg = get_ffmpeg_path()
+    if not ffmpeg:
+        return "libx264"
+
+    result = subprocess.run(
+        [ffmpeg, "-hide_banner", "-encoders"],
+        capture_output=True,
+        text=True
+    )
+    listed = {
+        fields[1]
+        for fields in (line.split() for line in result.stdout.splitlines())
+        if len(fields) > 1
+    }
+
+    for encoder in HARDWARE_ENCODERS:
+        if encoder in listed and _encoder_works(ffmpeg, encoder):
+            return encoder
+
+    return "libx264"
+
+
+def get_encoder_args(encoder: str) -> list:
+    """
+    Build the FFmpeg video codec arguments for an encoder.
+
+    Args:
+        encoder: FFmpeg encoder name (e.g. "libx264", "h264_nvenc")
+
+    Returns:
+        List of FFmpeg arguments starting with -c:v
+    """
+    if encoder == "libx264":
+        return ["-c:v", encoder, *LIBX264_ARGS]
+    return ["-c:v", encoder, *HARDWARE_ENCODERS.get(encoder, [])]
+
+
+def _read_mp3_duration(audio_path: str) -> Optional[float]:
+    """Read an MP3's duration from its headers with mutagen, if installed."""
+    if MP3 is None or not str(audio_path).lower().endswith(".mp3"):
+        return None
+    try:
+        return MP3(audio_path).info.length
+    except Exception:
+        return None
+
+
+def record_audio_duration(audio_path: str) -> None:
+    """
+    Store the duration sidecar for a freshly generated audio file.
+
+    If the duration cannot be read without ffprobe, any stale sidecar from a
+    previous version of the file is removed instead.
+
+    Args:
+        audio_path: Path to the audio file
+    """
+    duration = _read_mp3_duration(audio_path)
+    if duration is None:
+        Path(f"{audio_path}.dur").unlink(missing_ok=True)
+    else:
+        write_duration(audio_path, duration)
+
+
 def get_audio_duration(audio_path: str) -> float:
     """
-    Get the duration of an audio file in seconds using ffprobe.
+    Get the duration of an audio file in seconds.
+
+    Uses, in order: the `.dur` sidecar (written by generate_voice or an
+    earlier probe), the MP3 headers (via mutagen), and finally an ffprobe
+    subprocess.
 
     Args:
         audio_path: Path to the audio file
@@ -71,6 +232,72 @@ def get_audio_duration(audio_path: str) -> float:
     Returns:
         Duration in seconds as a float
     """
+    duration = read_duration(audio_path)
+    if duration is None:
+        duration = _read_mp3_duration(audio_path)
+    if duration is not None:
+        return duration
+
+    return _probe_duration(audio_path)
+
+
+def get_video_duration(video_path: str) -> float:
+    """
+    Get the duration of a video file in seconds.
+
+    Uses the `.dur` sidecar if there is one, otherwise an ffprobe subprocess.
+
+    Args:
+        video_path: Path to the video file
+
+    Returns:
+        Duration in seconds as a float
+    """
+    duration = read_duration(video_path)
+    if duration is not None:
+        return duration
+
+    return _probe_duration(video_path)
+
+
+def get_durations(media_paths: list, workers: int = 8) -> dict:
+    """
+    Get the durations of many media files.
+
+    Sidecars and MP3 headers are read first; the remaining files are probed
+    with ffprobe in parallel (the subprocesses run outside the GIL).
+
+    Args:
+        media_paths: Paths to audio or video files
+        workers: Maximum number of simultaneous ffprobe processes
+
+    Returns:
+        Dictionary mapping each path to its duration in seconds
+    """
+    durations = {}
+    unknown = []
+    for media_path in media_paths:
+        duration = read_duration(media_path)
+        if duration is None:
+            duration = _read_mp3_duration(media_path)
+        if duration is None:
+            unknown.append(media_path)
+        else:
+            durations[media_path] = duration
+
+    if len(unknown) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            durations.update(zip(unknown, executor.map(_probe_duration, unknown)))
+    elif unknown:
+        durations[unknown[0]] = _probe_duration(unknown[0])
+    return durations
+
+
+def _probe_duration(media_path: str) -> float:
+    """
+    Read a media file's duration with ffprobe and store it in a `.dur`
+    sidecar, so later runs do not spawn ffprobe for the same file again.
+    """
     ffprobe = get_ffprobe_path()
     if not ffprobe:
         raise RuntimeError("ffprobe not found")
@@ -79,22 +306,117 @@ def get_audio_duration(audio_path: str) -> float:
         ffprobe,
         "-v", "quiet",
         "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        audio_path
+        "-of", "json",
+        media_path
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
-    return float(result.stdout.strip())
+    duration = float(json.loads(result.stdout)["format"]["duration"])
 
+    try:
+        write_duration(media_path, duration)
+    except OSError:
+        pass  # e.g. a read-only directory; the duration is still valid
+    return duration
 
-def get_video_duration(video_path: str) -> float:
+
+def write_duration(media_path: str, duration: float) -> None:
     """
-    Get the duration of a video file in seconds using ffprobe.
+    Persist a media file's duration in a `.dur` sidecar next to it.
+
+    Later pipeline stages read the sidecar instead of spawning ffprobe.
 
     Args:
-        video_path: Path to the video file
+        media_path: Path to the media file
+        duration: Duration in seconds
+    """
+    Path(f"{media_path}.dur").write_text(f"{duration:.3f}\n")
+
+
+def read_duration(media_path: str) -> Optional[float]:
+    """
+    Read a duration previously stored with write_duration.
+
+    Args:
+        media_path: Path to the media file
 
     Returns:
-        Duration in seconds as a float
+        Duration in seconds, or None if no valid sidecar exists (sidecars
+        older than the media file are stale and ignored)
+    """
+    sidecar = Path(f"{media_path}.dur")
+    try:
+        if sidecar.stat().st_mtime_ns < os.stat(media_path).st_mtime_ns:
+            return None
+        return float(sidecar.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def get_stream_params(media_path: str) -> list:
+    """
+    Get the codec parameters of every stream in a media file.
+
+    Files can only be joined with the concat demuxer and stream copy when
+    these parameters match. Uses the `.streams` sidecar if there is one
+    (written by create_segment), otherwise ffprobe (see probe_stream_params).
+
+    Args:
+        media_path: Path to the media file
+
+    Returns:
+        List of per-stream parameter dictionaries
+    """
+    params = read_stream_params(media_path)
+    if params is not None:
+        return params
+
+    return probe_stream_params(media_path)
+
+
+def get_stream_params_many(media_paths: list, workers: int = 8) -> dict:
+    """
+    Get the codec parameters of many media files.
+
+    Sidecars are read first; the remaining files are probed with ffprobe in
+    parallel, as in get_durations.
+
+    Args:
+        media_paths: Paths to media files
+        workers: Maximum number of simultaneous ffprobe processes
+
+    Returns:
+        Dictionary mapping each path to its list of per-stream parameters
+    """
+    params = {}
+    unknown = []
+    for media_path in media_paths:
+        stream_params = read_stream_params(media_path)
+        if stream_params is None:
+            unknown.append(media_path)
+        else:
+            params[media_path] = stream_params
+
+    if len(unknown) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            params.update(zip(unknown, executor.map(probe_stream_params, unknown)))
+    elif unknown:
+        params[unknown[0]] = probe_stream_params(unknown[0])
+    return params
+
+
+def probe_stream_params(media_path: str) -> list:
+    """
+    Read a media file's codec parameters with ffprobe and store them in a
+    `.streams` sidecar, so later runs do not spawn ffprobe for the same file.
+    The container duration from the same call is stored in the `.dur`
+    sidecar (see write_duration).
+
+    Args:
+        media_path: Path to the media file
+
+    Returns:
+        List of per-stream parameter dictionaries (empty if ffprobe could not
+        read the file)
     """
     ffprobe = get_ffprobe_path()
     if not ffprobe:
@@ -102,13 +424,184 @@ def get_video_duration(video_path: str) -> float:
 
     cmd = [
         ffprobe,
-        "-v", "quiet",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        video_path
+        "-v", "error",
+        "-show_entries",
+        "stream=codec_type,codec_name,profile,width,height,pix_fmt,"
+        "time_base,r_frame_rate,sample_rate,channels:format=duration",
+        "-of", "json",
+        media_path
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
-    return float(result.stdout.strip())
+    info = json.loads(result.stdout or "{}")
+    params = info.get("streams", [])
+    duration = info.get("format", {}).get("duration")
+
+    try:
+        if params:
+            Path(f"{media_path}.streams").write_text(json.dumps(params) + "\n")
+        if duration is not None:
+            write_duration(media_path, float(duration))
+    except (OSError, ValueError):
+        pass  # e.g. a read-only directory; the parameters are still valid
+    return params
+
+
+def read_stream_params(media_path: str) -> Optional[list]:
+    """
+    Read codec parameters previously stored by probe_stream_params.
+
+    Args:
+        media_path: Path to the media file
+
+    Returns:
+        List of per-stream parameter dictionaries, or None if no valid
+        sidecar exists (sidecars older than the media file are ignored)
+    """
+    sidecar = Path(f"{media_path}.streams")
+    try:
+        if sidecar.stat().st_mtime_ns < os.stat(media_path).st_mtime_ns:
+            return None
+        params = json.loads(sidecar.read_text())
+    except (OSError, ValueError):
+        return None
+    return params if isinstance(params, list) else None
+
+
+def compute_inputs_hash(params: dict, files: list = None) -> str:
+    """
+    Compute a SHA-256 digest over a stage's inputs.
+
+    Args:
+        params: JSON-serializable parameters (text, prompt, effects, ...)
+        files: Optional input files whose contents are included in the digest
+
+    Returns:
+        Hex digest string
+    """
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256(canonical.encode("utf-8"))
+    for file_path in files or []:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def narration_fingerprint(narration: str) -> str:
+    """
+    Short digest of a narration, stored with generated prompts.
+
+    Args:
+        narration: Narration text
+
+    Returns:
+        16-character hex digest
+    """
+    return hashlib.blake2b(narration.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def load_manifest(output_dir: str) -> dict:
+    """
+    Load the input-hash manifest of an output directory.
+
+    Args:
+        output_dir: Directory containing generated outputs
+
+    Returns:
+        Mapping of segment_id to {"inputs_sha256": ...} (empty if missing)
+    """
+    try:
+        with open(Path(output_dir) / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir: str, manifest: dict) -> None:
+    """
+    Atomically write the input-hash manifest of an output directory.
+
+    Args:
+        output_dir: Directory containing generated outputs
+        manifest: Mapping of segment_id to manifest entry
+    """
+    path = Path(output_dir) / MANIFEST_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(output_file: Path, manifest: dict, segment_id: str, inputs_hash: str) -> bool:
+    """
+    Check whether an output was generated from the current inputs.
+
+    Outputs that predate the manifest are adopted as up to date and recorded
+    with the current hash, so existing projects are not regenerated.
+
+    Args:
+        output_file: Path to the generated output
+        manifest: Manifest loaded with load_manifest (updated in place)
+        segment_id: Segment ID
+        inputs_hash: Digest from compute_inputs_hash
+
+    Returns:
+        True if the output can be skipped
+    """
+    if not output_file.exists():
+        return False
+
+    entry = manifest.get(segment_id)
+    if entry is None:
+        manifest[segment_id] = {"inputs_sha256": inputs_hash}
+        return True
+
+    return entry.get("inputs_sha256") == inputs_hash
+
+
+def read_json(json_file: str) -> dict:
+    """
+    Load and parse a JSON file (with orjson when installed).
+
+    Args:
+        json_file: Path to the JSON file
+
+    Returns:
+        Parsed JSON data
+    """
+    if orjson is not None:
+        return orjson.loads(Path(json_file).read_bytes())
+
+    with open(json_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(json_file: str, data: dict) -> None:
+    """
+    Atomically write a JSON file, indented by two spaces.
+
+    The data is written to a temporary file first, so an interrupted run
+    never leaves a truncated file behind.
+
+    Args:
+        json_file: Path to the JSON file
+        data: Data to write
+    """
+    path = Path(json_file)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    content = None
+    if orjson is not None:
+        try:
+            # Same layout as json.dump(indent=2, ensure_ascii=False)
+            content = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; let the json module handle it
+    if content is None:
+        content = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
 
 
 def load_segments(segments_file: str) -> dict:
@@ -121,8 +614,18 @@ def load_segments(segments_file: str) -> dict:
     Returns:
         Parsed JSON as a dictionary
     """
-    with open(segments_file, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(segments_file)
+
+
+def save_segments(segments_file: str, data: dict) -> None:
+    """
+    Atomically write a segments.json file (see write_json).
+
+    Args:
+        segments_file: Path to the segments.json file
+        data: Segments data to write
+    """
+    write_json(segments_file, data)
 
 
 def ensure_dir(path: Path) -> Path:
@@ -167,16 +670,16 @@ def should_use_ken_burns(segment: dict, chapter: dict) -> bool:
     Returns:
         True if Ken Burns effects should be applied
     """
-    # Check chapter-level setting first
-    if not chapter.get("ken_burns_enabled", True):
+    # Segments without a sequence are the common case, so check them first
+    if not segment.get("ken_burns_sequence"):
         return False
 
-    # Check segment-level setting
-    ken_burns_sequence = segment.get("ken_burns_sequence", [])
-    if not ken_burns_sequence:
-        return False
+    # Chapter-level setting
+    return bool(chapter.get("ken_burns_enabled", True))
+
 
-    return True
+# Zero-padded minute/second fields for format_timestamp
+_TWO_DIGIT = tuple(f"{i:02d}" for i in range(60))
 
 
 def format_timestamp(seconds: float) -> str:
@@ -184,16 +687,15 @@ def format_timestamp(seconds: float) -> str:
     Format seconds as HH:MM:SS for YouTube chapters.
 
     Args:
-        seconds: Time in seconds
+        seconds: Time in seconds (non-negative)
 
     Returns:
         Formatted timestamp string
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
 
     if hours > 0:
-        return f"{hours}:{minutes:02d}:{secs:02d}"
+        return f"{hours}:{_TWO_DIGIT[minutes]}:{_TWO_DIGIT[secs]}"
     else:
-        return f"{minutes}:{secs:02d}"
+        return f"{minutes}:{_TWO_DIGIT[secs]}"
@@ -6,16 +6,19 @@ streamlined workflow.
 """
 
 import argparse
-import json
 import os
+import shlex
+import sqlite3
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 from prompt_generator import PromptGenerator
 from prompt_library import PromptLibrary
 from prompt_config import DEFAULT_CONFIG
+from utils import load_segments, narration_fingerprint, read_json, save_segments, write_json
 
 
 class VideoWorkflow:
@@ -73,8 +76,7 @@ class VideoWorkflow:
         print("="*60 + "\n")
         
         # Load segments
-        with open(self.segments_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_segments(self.segments_file)
         
         stats = {
             "total": 0,
@@ -84,85 +86,118 @@ class VideoWorkflow:
             "manual": 0
         }
         
-        # Process each segment
-        for chapter in data.get("chapters", []):
-            for segment in chapter.get("segments", []):
-                stats["total"] += 1
-                segment_id = segment.get("segment_id", "unknown")
-                
-                # Check if prompt already exists
-                if segment.get("image_prompt") and segment["image_prompt"] != "AUTO":
-                    print(f"[{segment_id}] Using existing prompt")
-                    stats["manual"] += 1
-                    continue
-                
-                narration = segment.get("narration", "")
-                if not narration:
-                    print(f"[{segment_id}] No narration, skipping")
-                    stats["skipped"] += 1
-                    continue
-                
-                # Try library first
-                library_prompt = None
-                if use_library and self.library:
-                    similar = self.library.get_similar_prompts(
-                        narration,
-                        limit=3,
-                        min_rating=4
-                    )
-                    
-                    if similar:
-                        print(f"[{segment_id}] Found {len(similar)} similar prompts in library")
-                        
-                        if interactive:
-                            print(f"\nNarration: {narration}\n")
-                            for i, prompt_data in enumerate(similar, 1):
-                                print(f"{i}. (ID: {prompt_data['id']}, Rating: {prompt_data['rating']}⭐)")
-                                print(f"   {prompt_data['prompt_text'][:100]}...\n")
-                            
-                            choice = input("Use library prompt? [1-3/n]: ").strip()
-                            if choice.isdigit() and 1 <= int(choice) <= len(similar):
-                                library_prompt = similar[int(choice) - 1]
-                        else:
-                            # Auto-select highest rated
-                            library_prompt = similar[0]
-                
-                # Generate or use library
-                if library_prompt:
-                    segment["image_prompt"] = library_prompt["prompt_text"]
-                    segment["image_prompt_negative"] = library_prompt.get("negative_prompt", "")
-                    segment["image_prompt_source"] = "library"
-                    segment["prompt_library_id"] = library_prompt["id"]
+        # Library usages, recorded together after the loop
+        usages = []
+        changed = False  # Whether any segment got a new prompt
+        
+        chapters = data.get("chapters", [])
+        project_name = data.get("project_name")
+        
+        # Look up library prompts for all segments that need one up front,
+        # so repeated narrations and concept sets are searched only once
+        similar_prompts = {}
+        if use_library and self.library:
+            similar_prompts = self.library.get_similar_prompts_batch(
+                [
+                    segment["narration"]
+                    for chapter in chapters
+                    for segment in chapter.get("segments", [])
+                    if not (segment.get("image_prompt") and segment["image_prompt"] != "AUTO")
+                    and segment.get("narration")
+                ],
+                limit=3,
+                min_rating=4
+            )
+        
+        # Save whatever was done if the run stops early (e.g. Ctrl-C during an
+        # interactive session); a rerun skips segments that have a prompt
+        try:
+            # Process each segment
+            for chapter in chapters:
+                for segment in chapter.get("segments", []):
+                    stats["total"] += 1
+                    segment_id = segment.get("segment_id", "unknown")
                     
-                    # Record usage
-                    self.library.record_usage(
-                        library_prompt["id"],
-                        segment_id=segment_id,
-                        project_name=data.get("project_name")
-                    )
+                    # Check if prompt already exists
+                    if segment.get("image_prompt") and segment["image_prompt"] != "AUTO":
+                        print(f"[{segment_id}] Using existing prompt")
+                        stats["manual"] += 1
+                        continue
                     
-                    print(f"[{segment_id}] ✓ Using library prompt (ID: {library_prompt['id']})")
-                    stats["from_library"] += 1
-                else:
-                    # Generate new prompt
-                    print(f"[{segment_id}] Generating new prompt...")
-                    result = self.generator.generate_from_narration(
-                        narration,
-                        style=style
-                    )
+                    narration = segment.get("narration", "")
+                    if not narration:
+                        print(f"[{segment_id}] No narration, skipping")
+                        stats["skipped"] += 1
+                        continue
                     
-                    segment["image_prompt"] = result["prompt"]
-                    segment["image_prompt_negative"] = result["negative_prompt"]
-                    segment["image_prompt_source"] = "generated"
-                    segment["agentic_concepts"] = result["concepts"]
-                    segment["visual_style"] = result["style"]
+                    # Try library first
+                    library_prompt = None
+                    if use_library and self.library:
+                        similar = similar_prompts[narration]
+                        
+                        if similar:
+                            print(f"[{segment_id}] Found {len(similar)} similar prompts in library")
+                            
+                            if interactive:
+                                print(f"\nNarration: {narration}\n")
+                                for i, prompt_data in enumerate(similar, 1):
+                                    print(f"{i}. (ID: {prompt_data['id']}, Rating: {prompt_data['rating']}⭐)")
+                                    print(f"   {prompt_data['prompt_text'][:100]}...\n")
+                                
+                                choice = input("Use library prompt? [1-3/n]: ").strip()
+                                if choice.isdigit() and 1 <= int(choice) <= len(similar):
+                                    library_prompt = similar[int(choice) - 1]
+                            else:
+                                # Auto-select highest rated
+                                library_prompt = similar[0]
                     
-                    print(f"[{segment_id}] ✓ Generated prompt")
-                    stats["generated"] += 1
-        
-        # Save enhanced segments
-        with open(self.segments_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+                    # Generate or use library
+                    if library_prompt:
+                        segment["image_prompt"] = library_prompt["prompt_text"]
+                        segment["image_prompt_negative"] = library_prompt.get("negative_prompt", "")
+                        segment["image_prompt_source"] = "library"
+                        segment["prompt_library_id"] = library_prompt["id"]
+                        # Library prompts are not regenerated on narration edits
+                        segment.pop("image_prompt_narration_fp", None)
+                        changed = True
+                        
+                        # Record usage
+                        usages.append((library_prompt["id"], segment_id, project_name))
+                        
+                        print(f"[{segment_id}] ✓ Using library prompt (ID: {library_prompt['id']})")
+                        stats["from_library"] += 1
+                    else:
+                        # Generate new prompt
+                        print(f"[{segment_id}] Generating new prompt...")
+                        result = self.generator.generate_from_narration(
+                            narration,
+                            style=style
+                        )
+                        
+                        segment["image_prompt"] = result["prompt"]
+                        segment["image_prompt_negative"] = result["negative_prompt"]
+                        segment["image_prompt_source"] = "generated"
+                        segment["image_prompt_narration_fp"] = narration_fingerprint(narration)
+                        segment["agentic_concepts"] = result["concepts"]
+                        segment["visual_style"] = result["style"]
+                        changed = True
+                        
+                        print(f"[{segment_id}] ✓ Generated prompt")
+                        stats["generated"] += 1
+        finally:
+            # Save enhanced segments first, so progress survives a failure below
+            if changed:
+                save_segments(self.segments_file, data)
+            else:
+                print("No new prompts, segments.json left unchanged")
+            
+            # A library error (e.g. a locked database) must not mask the
+            # exception or interrupt that ended the loop
+            if usages:
+                try:
+                    self.library.record_usages(usages)
+                except sqlite3.Error as e:
+                    print(f"✗ Could not record library prompt usage ({e})")
         
         print(f"\n{'='*60}")
         print("Prompt Generation Summary:")
@@ -280,10 +315,14 @@ class VideoWorkflow:
         result = subprocess.run(cmd)
         return result.returncode == 0
     
-    def review_and_save_prompts(self) -> int:
+    def review_and_save_prompts(self, editor: bool = False) -> int:
         """
         Review generated images and save successful prompts to library.
         
+        Args:
+            editor: Rate all prompts in one pass by editing a review file in
+                $EDITOR, instead of answering questions segment by segment
+        
         Returns:
             Number of prompts saved
         """
@@ -296,11 +335,15 @@ class VideoWorkflow:
         print("="*60 + "\n")
         
         # Load segments
-        with open(self.segments_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_segments(self.segments_file)
         
-        saved_count = 0
+        images_dir = self.images_dir
+        
+        # List the images once instead of checking each segment's file
+        image_names = {entry.name for entry in os.scandir(images_dir) if entry.is_file()}
         
+        # Segments with a non-library prompt and a generated image
+        reviewable = []
         for chapter in data.get("chapters", []):
             for segment in chapter.get("segments", []):
                 segment_id = segment.get("segment_id")
@@ -310,51 +353,19 @@ class VideoWorkflow:
                     continue
                 
                 # Check if image exists
-                image_path = self.images_dir / f"{segment_id}.png"
-                if not image_path.exists():
+                image_name = f"{segment_id}.png"
+                if image_name not in image_names:
                     continue
                 
-                prompt = segment.get("image_prompt")
-                if not prompt:
+                if not segment.get("image_prompt"):
                     continue
                 
-                print(f"\n[{segment_id}]")
-                print(f"Prompt: {prompt[:100]}...")
-                print(f"Image: {image_path}")
-                
-                # Ask for rating
-                rating_input = input("Rate this prompt (0-5, or 's' to skip): ").strip()
-                
-                if rating_input.lower() == 's':
-                    continue
-                
-                try:
-                    rating = int(rating_input)
-                    if not 0 <= rating <= 5:
-                        print("Invalid rating, skipping")
-                        continue
-                except ValueError:
-                    print("Invalid input, skipping")
-                    continue
-                
-                # Ask for tags
-                tags_input = input("Tags (comma-separated, optional): ").strip()
-                tags = [t.strip() for t in tags_input.split(',')] if tags_input else None
-                
-                # Save to library
-                prompt_id = self.library.save_prompt(
-                    prompt=prompt,
-                    negative_prompt=segment.get("image_prompt_negative"),
-                    narration=segment.get("narration"),
-                    concepts=segment.get("agentic_concepts"),
-                    style=segment.get("visual_style"),
-                    rating=rating,
-                    tags=tags,
-                    image_path=str(image_path)
-                )
-                
-                print(f"✓ Saved to library (ID: {prompt_id})")
-                saved_count += 1
+                reviewable.append((segment, images_dir / image_name))
+        
+        if editor:
+            saved_count = self._review_in_editor(reviewable)
+        else:
+            saved_count = self._review_interactively(reviewable)
         
         print(f"\n{'='*60}")
         print(f"Saved {saved_count} prompts to library")
@@ -362,12 +373,154 @@ class VideoWorkflow:
         
         return saved_count
     
+    def _review_interactively(self, reviewable: List[Tuple[Dict[str, Any], Path]]) -> int:
+        """Ask for a rating and tags per segment, saving each rated prompt."""
+        saved_count = 0
+        
+        for segment, image_path in reviewable:
+            segment_id = segment.get("segment_id")
+            prompt = segment["image_prompt"]
+            
+            print(f"\n[{segment_id}]")
+            print(f"Prompt: {prompt[:100]}...")
+            print(f"Image: {image_path}")
+            
+            # Ask for rating
+            rating_input = input("Rate this prompt (0-5, or 's' to skip): ").strip()
+            
+            if rating_input.lower() == 's':
+                continue
+            
+            try:
+                rating = int(rating_input)
+                if not 0 <= rating <= 5:
+                    print("Invalid rating, skipping")
+                    continue
+            except ValueError:
+                print("Invalid input, skipping")
+                continue
+            
+            # Ask for tags
+            tags_input = input("Tags (comma-separated, optional): ").strip()
+            tags = self._split_tags(tags_input)
+            
+            # Save to library
+            prompt_id = self.library.save_prompt(
+                **self._library_entry(segment, image_path, rating, tags)
+            )
+            
+            print(f"✓ Saved to library (ID: {prompt_id})")
+            saved_count += 1
+        
+        return saved_count
+    
+    def _review_in_editor(self, reviewable: List[Tuple[Dict[str, Any], Path]]) -> int:
+        """
+        Rate all prompts in one review file opened in $EDITOR, then save the
+        rated ones in a single transaction.
+        """
+        if not reviewable:
+            return 0
+        
+        review_file = self.project_dir / "review.json"
+        write_json(review_file, {
+            "instructions": "Set rating to 0-5 (leave null to skip) and optionally add tags.",
+            "prompts": [
+                {
+                    "segment_id": segment.get("segment_id"),
+                    "prompt": segment["image_prompt"],
+                    "image": str(image_path),
+                    "rating": None,
+                    "tags": []
+                }
+                for segment, image_path in reviewable
+            ]
+        })
+        
+        editor = os.environ.get("EDITOR", "vi")
+        print(f"Opening {review_file} in {editor}...")
+        try:
+            result = subprocess.run(shlex.split(editor) + [str(review_file)])
+        except (OSError, ValueError) as e:
+            print(f"✗ Could not run editor '{editor}' ({e}); nothing saved")
+            print(f"  Review file left at {review_file}")
+            return 0
+        if result.returncode != 0:
+            print(f"✗ Editor exited with status {result.returncode}; nothing saved")
+            print(f"  Review file left at {review_file}")
+            return 0
+        
+        try:
+            entries = read_json(review_file)["prompts"]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"✗ Could not read {review_file} ({e}); nothing saved")
+            return 0
+        
+        by_segment_id = {segment.get("segment_id"): (segment, image_path)
+                         for segment, image_path in reviewable}
+        rated = []
+        for entry in entries:
+            segment_id = entry.get("segment_id")
+            rating = entry.get("rating")
+            if rating is None or segment_id not in by_segment_id:
+                continue
+            # bool is an int subclass; true/false are not ratings
+            if isinstance(rating, bool) or not isinstance(rating, int) or not 0 <= rating <= 5:
+                print(f"[{segment_id}] Invalid rating, skipping")
+                continue
+            
+            # Tags as a comma-separated string (like the interactive
+            # prompt) or a list of strings
+            tags = entry.get("tags")
+            if isinstance(tags, str):
+                tags = self._split_tags(tags)
+            elif isinstance(tags, list) and all(isinstance(tag, str) for tag in tags):
+                tags = [tag.strip() for tag in tags if tag.strip()] or None
+            elif tags is not None:
+                print(f"[{segment_id}] Invalid tags, skipping")
+                continue
+            
+            segment, image_path = by_segment_id[segment_id]
+            rated.append((segment_id, self._library_entry(segment, image_path, rating, tags)))
+        
+        prompt_ids = self.library.save_prompts([prompt for _, prompt in rated])
+        for (segment_id, _), prompt_id in zip(rated, prompt_ids):
+            print(f"[{segment_id}] ✓ Saved to library (ID: {prompt_id})")
+        
+        review_file.unlink()
+        return len(prompt_ids)
+    
+    @staticmethod
+    def _split_tags(text: str) -> List[str]:
+        """Split comma-separated tags (None if there are none)."""
+        return [t.strip() for t in text.split(',')] if text else None
+    
+    @staticmethod
+    def _library_entry(
+        segment: Dict[str, Any],
+        image_path: Path,
+        rating: int,
+        tags: List[str] = None
+    ) -> Dict[str, Any]:
+        """save_prompt arguments for a reviewed segment."""
+        return {
+            "prompt": segment["image_prompt"],
+            "negative_prompt": segment.get("image_prompt_negative"),
+            "narration": segment.get("narration"),
+            "concepts": segment.get("agentic_concepts"),
+            "style": segment.get("visual_style"),
+            "rating": rating,
+            "tags": tags,
+            "image_path": str(image_path)
+        }
+    
     def run_full_workflow(
         self,
         style: str = None,
         use_library: bool = True,
         interactive: bool = False,
-        skip_review: bool = False
+        skip_review: bool = False,
+        review_in_editor: bool = False
     ) -> bool:
         """
         Run the complete workflow from prompts to final video.
@@ -377,6 +530,7 @@ class VideoWorkflow:
             use_library: Use prompt library
             interactive: Interactive mode
             skip_review: Skip prompt review step
+            review_in_editor: Review all prompts at once in $EDITOR
             
         Returns:
             True if successful
@@ -395,13 +549,18 @@ class VideoWorkflow:
             interactive=interactive
         )
         
-        # Step 2: Generate images
-        if not self.generate_images():
+        # Steps 2 and 3: images and audio only need segments.json and call
+        # different APIs, so run both scripts at once (their output interleaves)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            images = executor.submit(self.generate_images)
+            audio = executor.submit(self.generate_audio)
+            images_ok, audio_ok = images.result(), audio.result()
+        
+        if not images_ok:
             print("✗ Image generation failed")
             return False
         
-        # Step 3: Generate audio
-        if not self.generate_audio():
+        if not audio_ok:
             print("✗ Audio generation failed")
             return False
         
@@ -417,7 +576,7 @@ class VideoWorkflow:
         
         # Step 6: Review and save prompts (optional)
         if not skip_review and self.library:
-            self.review_and_save_prompts()
+            self.review_and_save_prompts(editor=review_in_editor)
         
         print("\n" + "="*60)
         print("✓ WORKFLOW COMPLETE!")
@@ -470,6 +629,12 @@ def main():
         help="Skip prompt review step"
     )
     
+    parser.add_argument(
+        "--review-in-editor",
+        action="store_true",
+        help="Rate all prompts in one file opened in $EDITOR instead of one by one"
+    )
+    
     parser.add_argument(
         "--prompts-only",
         action="store_true",
@@ -499,7 +664,8 @@ def main():
                 style=args.style,
                 use_library=not args.no_library,
                 interactive=args.interactive,
-                skip_review=args.skip_review
+                skip_review=args.skip_review,
+                review_in_editor=args.review_in_editor
             )
             
             if not success: